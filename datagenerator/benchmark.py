@@ -0,0 +1,339 @@
+from datagenerator.core import DataType
+from datagenerator.generation import Configuration
+from datagenerator.generation import InstanceGenerator
+from datagenerator.generation import ValueGenerator
+from datagenerator.writers import WriterFactory
+
+from multiprocessing import Pool
+from shutil import rmtree
+from tempfile import mkdtemp
+
+import json
+import numpy
+import os
+import platform
+import resource
+import time
+
+"""
+   Throughput benchmarks of the generation and of the writers. Every case is
+   run in a process of its own, so that its peak memory can be told apart
+   from the others', and measures::
+
+      rowsPerSecond  -- instances generated (or written) per second
+      bytesPerSecond -- bytes of column data generated (or of output written)
+                        per second
+      peakMemory     -- peak resident memory of the process, in bytes
+
+   Cases are of three kinds, run over several schema widths (the number of
+   features) and row counts::
+
+      sampler     -- every data type with every distribution
+      conditional -- every conditional of :mod:`datagenerator.conditionals`,
+                     labeling instances of ``int32`` features
+      writer      -- every writer type, writing ``int32`` features and a
+                     ``binary(1)`` label (generation isn't timed)
+
+   Cases that aren't supported (eg. a distribution a type can't be sampled
+   from) are reported with their error instead of measurements. Results can
+   be saved as JSON and compared against a stored baseline (see
+   :func:`compare`).
+"""
+
+kinds = ["sampler", "conditional", "writer"]
+
+dataTypes = ["int32", "int(1000)", "binary(1)", "binary(64)", "binary(1024)",
+             "value_list(a, b, c, d)", "string(16)", "float32", "float64"]
+
+# the parameters each distribution is sampled with (the weights of
+# ``weighted`` depend on the data type, see :func:`samplerOptions`)
+distributions = {
+      "uniform": {},
+      "beta": {"parameter1": "2", "parameter2": "5"},
+      "gamma": {"parameter1": "2", "parameter2": "1"},
+      "log-normal": {"parameter1": "0", "parameter2": "1"},
+      "weighted": {},
+      "roundrobin": {}}
+
+# the most values a ``weighted`` distribution is given weights for
+maxWeights = 1 << 16
+
+# the arguments each conditional is run with; their first feature is used
+conditionalArguments = {
+      "dummyConditional": {},
+      "rangeConditional": {
+            "instanceMembers": [1], "bucketSize": 268435456,
+            "values": [0, 1]},
+      "rangeForBinaryWithBernoulliParameterConditional": {
+            "instanceMembers": [1], "bucketSize": 268435456,
+            "values": [0.1, 0.9]}}
+
+defaultRows = [10000, 100000]
+defaultWidths = [1, 16]
+
+def cases(rows=None, widths=None, kinds=kinds):
+   """Returns the benchmark cases, as dictionaries that :func:`runCase` takes
+
+   Args:
+      rows (list): the numbers of instances of every case
+      widths (list): the numbers of features of every case
+      kinds (list): the kinds of cases (see :data:`kinds`)
+
+   """
+   cases = []
+
+   for count in rows or defaultRows:
+      for width in widths or defaultWidths:
+         common = {"rows": count, "width": width}
+         label = {"type": "binary(1)", "distribution": "uniform"}
+
+         if "sampler" in kinds:
+            for dataType in dataTypes:
+               for name in sorted(distributions):
+                  feature = samplerOptions(dataType, name)
+
+                  cases.append(dict(
+                        common, kind="sampler",
+                        name=caseName("sampler", dataType + " " + name,
+                                      count, width),
+                        features=[feature] * width, labels=[label]))
+
+         if "conditional" in kinds:
+            for name in sorted(conditionalArguments):
+               conditional = {
+                     "type": "binary(1)", "distribution": "conditional",
+                     "parameter1": name,
+                     "parameter2":
+                        repr(json.dumps(conditionalArguments[name]))}
+
+               cases.append(dict(
+                     common, kind="conditional",
+                     name=caseName("conditional", name, count, width),
+                     features=[{"type": "int32", "distribution": "uniform"}] *
+                              width,
+                     labels=[conditional]))
+
+         if "writer" in kinds:
+            for output in WriterFactory.validWriterTypes:
+               cases.append(dict(
+                     common, kind="writer", output=output,
+                     name=caseName("writer", output, count, width),
+                     features=[{"type": "int32", "distribution": "uniform"}] *
+                              width,
+                     labels=[label]))
+
+   return cases
+
+def samplerOptions(dataType, distribution):
+   """
+      Returns the options of a feature of the given type sampled from a
+      distribution. ``weighted`` distributions get Zipf's law weights (1/k
+      for the k-th value), or a single weight if the type has more than
+      :data:`maxWeights` values or doesn't hold integers, so that the case
+      reports the error
+   """
+   options = dict(distributions[distribution], type=dataType,
+                  distribution=distribution)
+
+   if distribution == "weighted":
+      try:
+         low, high = ValueGenerator.valueRange(DataType(dataType),
+                                               distribution)
+      except Exception:
+         low, high = 0, 1
+
+      if high - low > maxWeights:
+         low, high = 0, 1
+
+      options["weights"] = ",".join("%.6g" % (1.0 / k) for k in
+                                    range(1, high - low + 1))
+
+   return options
+
+def caseName(kind, what, rows, width):
+   return kind + "/" + what + "/rows=" + str(rows) + "/width=" + str(width)
+
+def configuration(case, directory, **options):
+   """
+      Returns the configuration of a case, writing its output to the given
+      directory
+   """
+   options["data_points"] = case["rows"]
+   options["features"] = len(case["features"])
+   options["labels"] = len(case["labels"])
+   options.setdefault("output", "csv")
+   options.setdefault("output_file", os.path.join(directory, "output"))
+
+   for what in ["feature", "label"]:
+      for n, item in enumerate(case[what + "s"], start=1):
+         for option, value in item.items():
+            options[what + "_" + str(n) + "_" + option] = value
+
+   return Configuration.fromOptions(options)
+
+def runCase(case, repeat=1):
+   """
+      Runs a case (see :func:`cases`) the given number of times and returns
+      its measurements of the fastest run, or the error that made it fail
+   """
+   directory = mkdtemp()
+   result = {"name": case["name"], "kind": case["kind"],
+             "rows": case["rows"], "width": case["width"]}
+
+   try:
+      if case["kind"] == "writer":
+         config = configuration(case, directory, output=case["output"])
+         run = writerRun(config)
+      else:
+         config = configuration(case, directory)
+         run = generationRun(config)
+
+      seconds, size = min(run() for n in range(repeat))
+
+      result["seconds"] = seconds
+      result["rowsPerSecond"] = case["rows"] / seconds
+      result["bytesPerSecond"] = size / seconds
+   except Exception as e:
+      result["error"] = str(e)
+   finally:
+      rmtree(directory)
+
+   # kilobytes on Linux
+   result["peakMemory"] = \
+         resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+   return result
+
+def generationRun(config):
+   """
+      Returns a function that generates the data of a configuration and
+      returns how long it took and how many bytes of columns it generated
+   """
+   def run():
+      g = InstanceGenerator(config, 0)
+      size = 0
+      start = time.time()
+
+      for batch in g.generateBatches(config.dataPoints):
+         size += sum(column.nbytes for column in batch.columns)
+
+      return time.time() - start, size
+
+   return run
+
+def writerRun(config):
+   """
+      Returns a function that writes the data of a configuration and returns
+      how long writing it took (generating it isn't counted) and how many
+      bytes it wrote. Batches are generated as they're written, so that the
+      peak memory of the case doesn't include the whole data
+   """
+   options = dict(config.parser.items('global'))
+
+   def run():
+      g = InstanceGenerator(config, 0)
+      w = WriterFactory.create(**options)
+
+      start = time.time()
+      w.open()
+      seconds = time.time() - start
+
+      for batch in g.generateBatches(config.dataPoints):
+         start = time.time()
+         w.writeBatch(batch)
+         seconds += time.time() - start
+
+      start = time.time()
+      w.close()
+      seconds += time.time() - start
+
+      return seconds, outputSize(config.outputFile)
+
+   return run
+
+def outputSize(fileName):
+   if not os.path.isdir(fileName):
+      return os.path.getsize(fileName)
+
+   return sum(os.path.getsize(os.path.join(fileName, name))
+              for name in os.listdir(fileName))
+
+def run(cases, repeat=1, report=None):
+   """Runs every case in a new process and returns the results
+
+   Args:
+      cases (list): cases as returned by :func:`cases`
+      repeat (int): times every case is run (the fastest run is kept)
+      report (function): called with every result as soon as it's available
+
+   Returns:
+      a dictionary with the ``environment`` the cases were run in and their
+      ``results``
+
+   """
+   results = []
+   pool = Pool(1, maxtasksperchild=1)
+
+   try:
+      for case in cases:
+         result = pool.apply(runCase, (case, repeat))
+         results.append(result)
+
+         if report is not None:
+            report(result)
+   finally:
+      pool.close()
+      pool.join()
+
+   return {"environment": environment(), "results": results}
+
+def environment():
+   return {"python": platform.python_version(),
+           "numpy": numpy.__version__,
+           "machine": platform.machine(),
+           "processor": platform.processor(),
+           "system": platform.system()}
+
+def compare(results, baseline, tolerance=0.1):
+   """Compares the throughput of the cases of two runs
+
+   Args:
+      results (dict): the results of a run (see :func:`run`)
+      baseline (dict): the results of the run to compare against
+      tolerance (float): the slowdown, as a fraction of the baseline
+                         throughput, up to which a case doesn't regress
+
+   Returns:
+      a list with a dictionary per case measured in both runs, holding its
+      ``name``, the ``baseline`` and ``current`` rows per second, the
+      relative ``change`` and whether it's a ``regression``
+
+   """
+   baselineRates = dict((result["name"], result["rowsPerSecond"])
+                        for result in baseline["results"]
+                        if "rowsPerSecond" in result)
+   comparison = []
+
+   for result in results["results"]:
+      if "rowsPerSecond" not in result or \
+         result["name"] not in baselineRates:
+         continue
+
+      before = baselineRates[result["name"]]
+      change = result["rowsPerSecond"] / before - 1
+
+      comparison.append({"name": result["name"],
+                         "baseline": before,
+                         "current": result["rowsPerSecond"],
+                         "change": change,
+                         "regression": change < -tolerance})
+
+   return comparison
+
+def save(results, fileName):
+   outFile = open(fileName, 'w')
+   json.dump(results, outFile, indent=1, sort_keys=True)
+   outFile.close()
+
+def load(fileName):
+   return json.load(open(fileName))
@@ -0,0 +1,153 @@
+import zlib
+
+from collections import deque
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+"""
+   Compressed output streams. The text written to a stream is cut into blocks
+   that get compressed independently by a pool of threads (the compressors
+   release the GIL), so compression keeps up with the generation instead of
+   stalling it. Every block becomes a complete gzip member, xz stream or zstd
+   frame, and the blocks are written in order: the concatenation is a valid
+   file for the standard tools (``gunzip``, ``xz -d``, ``zstd -d``) and
+   libraries (eg. ``gzip.open``).
+
+   ``xz`` needs the ``lzma`` module (``backports.lzma`` on python 2) and
+   ``zstd`` the ``zstandard`` package. They're only imported when used.
+"""
+
+methods = ["none", "gzip", "xz", "zstd"]
+extensions = {".gz": "gzip", ".xz": "xz", ".zst": "zstd"}
+
+defaultBlockSize = 1 << 20
+
+def compressionMethod(fileName, method=None):
+   """Returns the compression method of an output file: the given one, if
+      any, or the one its extension stands for
+
+   Raises:
+      Exception: if the method is unknown
+   """
+   if method is None:
+      for extension, implied in extensions.items():
+         if fileName.endswith(extension):
+            return implied
+
+      return "none"
+
+   if method not in methods:
+      raise Exception("unknown compression method " + method)
+
+   return method
+
+def blockCompressor(method, level=None):
+   """
+      Returns a function that compresses a block of text into a self-contained
+      gzip member, xz stream or zstd frame
+
+   Raises:
+      Exception: if the module the method needs isn't available
+   """
+   if method == "gzip":
+      level = 6 if level is None else level
+
+      def compress(block):
+         # a window of 16 + 15 bits makes zlib write a gzip header and trailer
+         compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + 15)
+         return compressor.compress(block) + compressor.flush()
+
+      return compress
+   elif method == "xz":
+      try:
+         import lzma
+      except ImportError:
+         try:
+            from backports import lzma
+         except ImportError:
+            raise Exception("'xz' compression requires the lzma module")
+
+      preset = 6 if level is None else level
+      return lambda block: lzma.compress(block, preset=preset)
+   elif method == "zstd":
+      try:
+         import zstandard
+      except ImportError:
+         raise Exception("'zstd' compression requires the zstandard package")
+
+      compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+      return compressor.compress
+   else:
+      raise Exception("unknown compression method " + method)
+
+class CompressedFile():
+   """A write-only file that compresses what is written to it, a block at a
+      time, in background threads
+   """
+
+   def __init__(self, fileName, method, level=None, threads=None,
+                blockSize=defaultBlockSize):
+      """
+      Args:
+         fileName (str): the file that gets written
+         method (str): one of ``gzip``, ``xz`` or ``zstd``
+         level (int): the compression level. The default depends on the method
+         threads (int): the number of compressing threads. By default, one
+                        per CPU
+         blockSize (int): the size of the (uncompressed) blocks
+
+      """
+      threads = threads or cpu_count()
+
+      self.compress = blockCompressor(method, level)
+      self.outFile = open(fileName, 'wb')
+      self.pool = ThreadPool(threads)
+      self.blockSize = blockSize
+      self.buffer = []
+      self.buffered = 0
+      # compressed blocks in flight, oldest first; bounded so that memory
+      # doesn't grow when the disk is slower than the generation
+      self.pending = deque()
+      self.maxPending = 2 * threads
+
+   def write(self, text):
+      self.buffer.append(text)
+      self.buffered += len(text)
+
+      if self.buffered >= self.blockSize:
+         self.submit()
+
+   def submit(self):
+      if not self.buffered:
+         return
+
+      block = ''.join(self.buffer)
+      self.buffer = []
+      self.buffered = 0
+
+      if len(self.pending) == self.maxPending:
+         self.outFile.write(self.pending.popleft().get())
+
+      self.pending.append(self.pool.apply_async(self.compress, (block,)))
+
+   def close(self):
+      self.submit()
+
+      while self.pending:
+         self.outFile.write(self.pending.popleft().get())
+
+      self.pool.close()
+      self.pool.join()
+      self.outFile.close()
+
+def openOutput(fileName, method=None, level=None, threads=None):
+   """
+      Opens an output file for writing, compressed with the given method, or
+      the one implied by its extension (see :func:`compressionMethod`)
+   """
+   method = compressionMethod(fileName, method)
+
+   if method == "none":
+      return open(fileName, 'w')
+
+   return CompressedFile(fileName, method, level, threads)
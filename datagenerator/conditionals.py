@@ -1,6 +1,7 @@
-from random import random
 from math import floor
 
+import numpy
+
 """
    Every function defined here gets provided with the same arguments. The
    arguments that a function receives can get extended by inserting entries in
@@ -19,13 +20,19 @@ from math import floor
       instance (Instance):
          the instance to which the generated value will be added. It is used to
          access other items in the instance that determine how this
+
+      random (RowRandom):
+         the source of the random numbers of the value: a
+         :class:`datagenerator.rng.RowRandom` at the stream of the item and
+         the row of the instance (see :class:`datagenerator.generation.
+         GenerationPlan`), or anything with a ``random`` method
 """
 
-def dummyConditional(args, dataType, instance):
+def dummyConditional(args, dataType, instance, random):
    # does nothing ; used for testing
    pass
 
-def rangeConditional(args, dataType, instance):
+def rangeConditional(args, dataType, instance, random):
    """
       Generates a value based on ranges that are determined by the given
       parameters. The number of ranges (a.k.a. buckets or intervals) are
@@ -142,33 +149,11 @@ def rangeConditional(args, dataType, instance):
    """
    ## validate arguments
 
-   if args.get("instanceMembers") is None:
-      raise Exception("missing 'columns' in rangeConditional args")
-   if args.get("bucketSize") is None:
-      raise Exception("missing 'bucketSize' in rangeConditional args")
-   if args.get("values") is None:
-      raise Exception("missing 'values' in rangeConditional args")
-
-   if len(args["instanceMembers"]) is not 1:
-      raise Exception("only one element allowed in the 'instanceMembers' list")
+   instanceItemIndex, bucketSize = validateRangeArgs(args, instance.size())
 
-   instanceItemIndex = args["instanceMembers"][0] - 1
-
-   if instanceItemIndex > instance.size or instanceItemIndex < 0:
-      raise Exception(
-            "item index must be in the [1, instance.size] range: " + 
-            str(instanceItemIndex))
-
-   bucketSize = args["bucketSize"]
    maxValue = 2147483648 # TODO: to generalize, replace by a getMax()
                          #       that works on binaries too
 
-   if (bucketSize > (maxValue * 2)):
-      raise Exception("'bucketSize' greater than maximum int value range")
-
-   if type(bucketSize) is not int:
-      raise Exception("'bucketSize' should be integer")
-
    ########
    # the actual conditional generation, in 4 simple steps (assumes integers only)
    ########
@@ -187,13 +172,131 @@ def rangeConditional(args, dataType, instance):
 
    return args["values"][indexOfAssignmentValue]
 
-def rangeForBinaryWithBernoulliParameterConditional(args, dataType, instance):
+def rangeConditionalColumn(args, dataType, schema):
+   """
+      Column-level version of :func:`rangeConditional`. The arguments are
+      validated once, here, and the returned function generates the whole
+      column of a :class:`datagenerator.core.Batch` at once.
+
+      Args:
+
+      schema (Schema):
+         the layout of the batches that will be generated
+
+      Returns:
+         a function that receives a batch and a source of randomness and
+         returns the column
+   """
+   indexer = rangeIndexer(args, schema)
+   values = numpy.array([dataType.encode(v) for v in args["values"]]) \
+      .astype(dataType.dtype)
+
+   def sample(batch, random):
+      return values[indexer(batch)]
+
+   return sample
+
+def rangeForBinaryWithBernoulliParameterConditional(args, dataType, instance,
+                                                    random):
    """
       Can only be applied to binary members of the instance ("instanceMembers")
 
       values (list) : a list of values in the range [0,1) that describe the 
                       bernoulli parameter used to generate a random value
    """
+   instanceItemIndex, bucketSize = validateRangeArgs(args, instance.size())
+
+   maxValue = 2147483648 # TODO: to generalize, replace by a getMax()
+                         #       that works on binaries too
+
+   itemValue = instance.value(instance.items[instanceItemIndex])
+   itemValue += maxValue
+   bucketNumber = floor(itemValue / bucketSize)
+   indexOfAssignmentValue = int(bucketNumber % len(args["values"]))
+
+   p = args["values"][indexOfAssignmentValue]
+
+   if random.random() < p:
+      return 1
+   else:
+      return 0
+
+def rangeForBinaryWithBernoulliParameterConditionalColumn(
+      args, dataType, schema):
+   """
+      Column-level version of
+      :func:`rangeForBinaryWithBernoulliParameterConditional` (see
+      :func:`rangeConditionalColumn`): the bernoulli parameter of every row is
+      looked up from its bucket and compared against a single column of
+      uniform draws.
+   """
+   indexer = rangeIndexer(args, schema)
+   p = numpy.array(args["values"], dtype=numpy.float64)
+
+   def sample(batch, random):
+      return (random.random_sample(len(batch)) < p[indexer(batch)]) \
+            .astype(dataType.dtype)
+
+   return sample
+
+def rangeIndexer(args, schema):
+   """
+      Returns a function that obtains, for every row of a batch, the index of
+      the entry of the ``"values"`` list that its bucket gets mapped to, as
+      described in :func:`rangeConditional`.
+
+      Raises:
+
+      Exception:
+         if the arguments are wrong (see :func:`validateRangeArgs`) or if the
+         member isn't an integer (or an up to 64-bit binary)
+   """
+   instanceItemIndex, bucketSize = validateRangeArgs(args, schema.size())
+
+   member = schema.items[instanceItemIndex].dataType
+   numberOfValues = len(args["values"])
+
+   if member.dtype.kind not in "iu" or member.shape:
+      raise Exception("'instanceMembers' should refer to an integer item")
+
+   # shift the range (make all numbers positive), obtain the bucket number
+   # and map it to the values list in a round-robin fashion
+   if member.dtype == numpy.uint64:
+      shift = numpy.uint64(2147483648)
+      bucketSize = numpy.uint64(bucketSize)
+      numberOfValues = numpy.uint64(numberOfValues)
+
+      def indexer(batch):
+         column = batch.columns[instanceItemIndex]
+         return ((column + shift) // bucketSize % numberOfValues) \
+               .astype(numpy.intp)
+
+      return indexer
+
+   def indexer(batch):
+      column = batch.columns[instanceItemIndex].astype(numpy.int64)
+      return (column + 2147483648) // bucketSize % numberOfValues
+
+   return indexer
+
+def validateRangeArgs(args, numberOfItems):
+   """
+      Validates the arguments of the range conditionals (see
+      :func:`rangeConditional`).
+
+      Args:
+
+      numberOfItems (int):
+         the number of items (features and labels) of an instance
+
+      Returns:
+         the index of the item being conditioned on and the bucket size
+
+      Raises:
+
+      Exception:
+         if one of the arguments is not given or is wrong
+   """
    if args.get("instanceMembers") is None:
       raise Exception("missing 'columns' in rangeConditional args")
    if args.get("bucketSize") is None:
@@ -206,14 +309,13 @@ def rangeForBinaryWithBernoulliParameterConditional(args, dataType, instance):
 
    instanceItemIndex = args["instanceMembers"][0] - 1
 
-   if instanceItemIndex > instance.size or instanceItemIndex < 0:
+   if instanceItemIndex >= numberOfItems or instanceItemIndex < 0:
       raise Exception(
             "item index must be in the [1, instance.size] range: " + 
             str(instanceItemIndex))
 
    bucketSize = args["bucketSize"]
-   maxValue = 2147483648 # TODO: to generalize, replace by a getMax()
-                         #       that works on binaries too
+   maxValue = 2147483648
 
    if (bucketSize > (maxValue * 2)):
       raise Exception("'bucketSize' greater than maximum int value range")
@@ -221,14 +323,4 @@ def rangeForBinaryWithBernoulliParameterConditional(args, dataType, instance):
    if type(bucketSize) is not int:
       raise Exception("'bucketSize' should be integer")
 
-   itemValue = instance.value(instance.items[instanceItemIndex])
-   itemValue += maxValue
-   bucketNumber = floor(itemValue / bucketSize)
-   indexOfAssignmentValue = int(bucketNumber % len(args["values"]))
-
-   p = args["values"][indexOfAssignmentValue]
-
-   if random() < p:
-      return 1
-   else:
-      return 0
+   return instanceItemIndex, bucketSize
@@ -1,23 +1,101 @@
+import binascii
+import numpy
 import re
+import string
 
-class Instance():
-   """An instance corresponds to a set of features and set of labels
+class Schema(object):
+   """The compiled layout of an instance. Every feature and label gets an
+      integer slot that indexes the value buffer of the instances built on top
+      of it, so the layout is resolved once instead of on every assignment
    """
-   def __init__(self, number, features, labels):
+   __slots__ = ('features', 'labels', 'items', 'slots', 'empty')
+
+   def __init__(self, features, labels):
       """
       Args:
-         number (int): the instance number (or ID)
          features (list): a :class:`Feature` list
          labels (list): a :class:`Label` list
       """
-      self.number = number
       self.features = features
       self.labels = labels
       self.items = features + labels
-      self.itemValues = [None] * (len(self.labels) + len(self.features))
+      self.slots = dict((id(item), n) for n, item in enumerate(self.items))
+      self.empty = [None] * len(self.items)
 
    def size(self):
-      return self.items.size
+      return len(self.items)
+
+   def slot(self, item):
+      """
+         Returns the slot assigned to the given feature or label.
+
+         Args:
+            item (Feature or Label): the item being looked up
+
+         Raises:
+            Exception: if the item isn't in this schema's list of items
+      """
+      n = self.slots.get(id(item))
+
+      if n is not None:
+         return n
+
+      # items are indexed by identity; an equal copy of an item (eg. one read
+      # from another parse of the same configuration) is looked up the slow way
+      for n, other in enumerate(self.items):
+         if other == item:
+            return n
+
+      raise Exception("item " + str(item) + " not in list of items")
+
+class Instance(object):
+   """An instance corresponds to a set of features and set of labels. Its
+      values are kept in a buffer indexed by the slots of a :class:`Schema`,
+      which can be reused for consecutive instances (see :meth:`reset`)
+   """
+   __slots__ = ('number', 'schema', 'itemValues')
+
+   def __init__(self, number, features, labels, schema=None):
+      """
+      Args:
+         number (int): the instance number (or ID)
+         features (list): a :class:`Feature` list
+         labels (list): a :class:`Label` list
+         schema (Schema): the compiled layout of ``features`` and ``labels``.
+                          If not given, one is built for this instance
+      """
+      if schema is None:
+         schema = Schema(features, labels)
+
+      self.number = number
+      self.schema = schema
+      self.itemValues = list(schema.empty)
+
+   @property
+   def features(self):
+      return self.schema.features
+
+   @property
+   def labels(self):
+      return self.schema.labels
+
+   @property
+   def items(self):
+      return self.schema.items
+
+   def size(self):
+      return self.schema.size()
+
+   def reset(self, number):
+      """
+         Clears the values of this instance so that the buffer can hold the
+         values of the instance with the given number.
+
+         Args:
+            number (int): the number (or ID) of the next instance
+      """
+      self.number = number
+      self.itemValues[:] = self.schema.empty
 
    def assign(self, item, value):
       """
@@ -32,15 +110,10 @@ class Instance():
 
          TODO:
             - validate the assignment with the data type, eg. if an attribute
-            - this method is needless, use a dictionary for items (with 
-                  features/values as keys) and remove it (as well as `value`)
       """
-      if item not in self.items:
-         raise Exception("item " + str(item) + " not in list of items")
-
-      n = self.items.index(item)
+      n = self.schema.slot(item)
 
-      if self.itemValues[n] != None:
+      if self.itemValues[n] is not None:
          raise Exception(
                "item " + str(item) + " already assigned with " + 
                str(self.itemValues[n]))
@@ -58,16 +131,99 @@ class Instance():
             Exception: if the item isn't in this instance's feature list or
                        if the item has not been already assigned with a value
       """
-      if item not in self.items:
-         raise Exception("item " + str(item) + " not in list of items")
-
-      n = self.items.index(item)
+      n = self.schema.slot(item)
 
-      if self.itemValues[n] == None:
+      if self.itemValues[n] is None:
          raise Exception("item " + str(item) + " not assigned")
 
       return self.itemValues[n]
 
+class Batch(object):
+   """A block of consecutive instances stored column by column: one typed
+      array per feature and label (see :meth:`DataType.allocate`), indexed by
+      the slots of a :class:`Schema`
+   """
+   __slots__ = ('start', 'length', 'schema', 'columns')
+
+   def __init__(self, start, length, schema, columns=None):
+      """
+      Args:
+         start (int): the number (or ID) of the first instance in the batch
+         length (int): the number of instances in the batch
+         schema (Schema): the layout of the instances
+         columns (list): one array per slot of ``schema``. If not given, they
+                         get allocated (zero-filled)
+      """
+      if columns is None:
+         columns = [item.dataType.allocate(length) for item in schema.items]
+
+      self.start = start
+      self.length = length
+      self.schema = schema
+      self.columns = columns
+
+   @staticmethod
+   def fromInstance(instance):
+      """
+         Returns a batch holding a single instance (the inverse of
+         :meth:`instance`)
+      """
+      batch = Batch(instance.number, 1, instance.schema)
+
+      for column, item, value in zip(
+            batch.columns, instance.items, instance.itemValues):
+         column[0] = item.dataType.encode(value)
+
+      return batch
+
+   def __len__(self):
+      return self.length
+
+   def size(self):
+      return self.length
+
+   def column(self, item):
+      """
+         Returns the array holding the values of the given feature or label.
+
+         Raises:
+            Exception: if the item isn't in this batch's list of items
+      """
+      return self.columns[self.schema.slot(item)]
+
+   def instance(self, row, instance=None):
+      """
+         Returns the given row of the batch as an :class:`Instance`.
+
+         Args:
+            row (int): the row, relative to the start of the batch
+            instance (Instance): a buffer to reuse. If not given (or if it
+                                 belongs to another schema), a new one is
+                                 created
+      """
+      if instance is None or instance.schema is not self.schema:
+         instance = Instance(0, None, None, self.schema)
+
+      instance.reset(self.start + row)
+
+      values = instance.itemValues
+
+      for n, item in enumerate(self.schema.items):
+         values[n] = item.dataType.decode(self.columns[n][row])
+
+      return instance
+
+   def instances(self):
+      """
+         Iterates over the rows of the batch. The same :class:`Instance`
+         buffer is yielded every time, so it's only valid until the next one.
+      """
+      instance = None
+
+      for row in range(self.length):
+         instance = self.instance(row, instance)
+         yield instance
+
 class InstanceItem():
    def __init__(self, name, dataType, distribution):
       """Creates a member of an instance.
@@ -93,31 +249,50 @@ class Label(InstanceItem):
    pass
 
 class DataType():
-   def __init__(self, spec):
+   # the characters strings are made of, unless given (see :meth:`setAlphabet`)
+   defaultAlphabet = string.ascii_letters + string.digits
+
+   def __init__(self, spec, values=None):
       """Creates a data type.
 
       Args:
          spec (str): valid data types specifications are::
 
             int32       -- 4-byte integer
-            string(n)   -- an n-th character string (UTF-8)
+            string(n)   -- an n-th character string (UTF-8), made of the
+                           characters of an alphabet (see
+                           :meth:`setAlphabet`)
             binary(n)   -- an n-th bit binary value
             conditional --
             int(n)      -- an integer in the [0, n] range
+            float32     -- 4-byte floating point number
+            float64     -- 8-byte floating point number
+            value_list(val1, val2, ...) -- one of the given values
+
+         values: for ``value_list``, the values if they aren't part of the
+                 specification (eg. a :class:`datagenerator.values.
+                 ValuesFile`)
 
       Raises:
          Exception: if the type is not of the ones specified :class:`Exception`
 
       """
 
+      self.alphabet = None
+
       if "string" in spec:
          self.name = "string"
          self.size = DataType.extractSize(spec)
          self.values = None
+         self.alphabet = DataType.defaultAlphabet
       elif "binary" in spec:
          self.name = "binary"
          self.size = DataType.extractSize(spec)
          self.values = None
+      elif spec == "float32" or spec == "float64":
+         self.name = spec
+         self.size = 1
+         self.values = None
       elif spec == "int32":
          self.name = "int32"
          self.size = 1
@@ -132,17 +307,138 @@ class DataType():
          self.values = None
       elif "value_list" in spec:
          self.name = "value_list"
-         self.values = DataType.extractValues(spec)
-         if len(self.values) == 0:
-            raise Exception("'value_list' data type expects at least one value")
-         self.size = len(max(self.values, key=len))
+         if values is not None:
+            self.values = values
+            self.size = values.longest()
+         else:
+            self.values = DataType.extractValues(spec)
+            if len(self.values) == 0:
+               raise Exception(
+                     "'value_list' data type expects at least one value")
+            self.size = len(max(self.values, key=len))
       else:
          raise Exception("unknown data type " + spec)
 
+      self.dtype, self.shape = DataType.columnLayout(
+            self.name, self.size, self.values)
+
    def __eq__(self, other):
       return self.name == other.name and \
              self.size == other.size and \
-             self.values == other.values
+             self.values == other.values and \
+             self.alphabet == other.alphabet
+
+   def setAlphabet(self, alphabet):
+      """Sets the characters the values of a ``string`` data type are made of.
+         A character that appears several times is proportionally more
+         frequent
+
+      Args:
+         alphabet (str): ASCII characters (but NUL)
+
+      Raises:
+         Exception: if the data type isn't ``string`` or the alphabet is empty
+                    or has other characters
+
+      """
+      if self.name != "string":
+         raise Exception("only 'string' data types have an alphabet")
+
+      if len(alphabet) == 0:
+         raise Exception("the alphabet of a 'string' data type can't be empty")
+
+      if any(not 0 < ord(c) < 128 for c in alphabet):
+         raise Exception("the alphabet of a 'string' data type should only "
+                         "have ASCII characters")
+
+      self.alphabet = alphabet
+
+   def isFloat(self):
+      return self.name == "float32" or self.name == "float64"
+
+   def allocate(self, length):
+      """Allocates a zero-filled column for ``length`` values of this type
+      """
+      return numpy.zeros((length,) + self.shape, self.dtype)
+
+   def encode(self, value):
+      """Returns the representation of a value in a column of this type.
+         ``binary`` values are stored as unsigned integers (packed in bytes
+         when wider than 64 bits) and ``value_list`` values as the index of
+         the value in the list
+
+      Args:
+         value: a value as generated for this type, eg. a bit string for
+                ``binary``
+
+      """
+      if self.name == "binary":
+         if isinstance(value, basestring):
+            value = int(value, 2)
+         if self.shape:
+            return numpy.frombuffer(
+                  binascii.unhexlify('%0*x' % (2 * self.shape[0], value)),
+                  numpy.uint8)
+         return value
+      elif self.name == "value_list":
+         return self.values.index(str(value))
+      else:
+         return value
+
+   def decode(self, code):
+      """Returns the value represented by a column entry (the inverse of
+         :meth:`encode`). Numbers are returned as python integers
+      """
+      if self.name == "binary":
+         if self.shape:
+            return int(binascii.hexlify(code.tostring()), 16)
+         return int(code)
+      elif self.name == "value_list":
+         return self.values[code]
+      elif self.name == "int32" or self.name == "int":
+         return int(code)
+      elif self.isFloat():
+         return float(code)
+      elif self.name == "string":
+         return str(code)
+      else:
+         return code
+
+   @staticmethod
+   def columnLayout(name, size, values):
+      """Returns the numpy dtype and the per-value shape used to store values
+         of a data type in a column
+
+      Args:
+         name (str): the name of the data type
+         size (int): the size of the data type
+         values: the values of the data type
+
+      """
+      if name == "int32":
+         return numpy.dtype(numpy.int32), ()
+      elif name == "float32" or name == "float64":
+         return numpy.dtype(name), ()
+      elif name == "int":
+         if values <= 2147483648:
+            return numpy.dtype(numpy.int32), ()
+         return numpy.dtype(numpy.int64), ()
+      elif name == "binary":
+         if size <= 8:
+            return numpy.dtype(numpy.uint8), ()
+         elif size <= 16:
+            return numpy.dtype(numpy.uint16), ()
+         elif size <= 32:
+            return numpy.dtype(numpy.uint32), ()
+         elif size <= 64:
+            return numpy.dtype(numpy.uint64), ()
+         return numpy.dtype(numpy.uint8), ((size + 7) // 8,)
+      elif name == "value_list":
+         return numpy.dtype(numpy.int32), ()
+      elif name == "string":
+         return numpy.dtype('S' + str(max(size, 1))), ()
+      else:
+         return numpy.dtype(object), ()
 
    @staticmethod
    def extractSize(dataType):
@@ -198,7 +494,11 @@ class Distribution():
             uniform --
             gamma   --
             beta    --
+            log-normal --
             conditional --
+            weighted    -- values picked with a probability proportional to
+                           their weight
+            roundrobin  -- values picked in order, looping through them
 
       Raises:
          Exception: if the type is not of the ones specified :class:`Exception`
@@ -209,7 +509,9 @@ class Distribution():
          name != "gamma" and \
          name != "beta" and \
          name != "conditional" and \
-         name != "log-normal":
+         name != "log-normal" and \
+         name != "weighted" and \
+         name != "roundrobin":
          raise Exception("unknown distribution type " + name)
 
       self.name = name
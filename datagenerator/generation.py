@@ -1,45 +1,106 @@
+from datagenerator.core import Batch
 from datagenerator.core import DataType
 from datagenerator.core import Distribution
 from datagenerator.core import Feature
 from datagenerator.core import Instance
 from datagenerator.core import Label
-
+from datagenerator.core import Schema
+
+from datagenerator.pipeline import Prefetcher
+from datagenerator.rng import CounterRandom
+from datagenerator.rng import RowRandom
+from datagenerator.stats import Stats
+from datagenerator.tracing import Tracer
+from datagenerator.values import ValuesFile
+from datagenerator.writers import Writer
 from datagenerator.writers import WriterFactory
 
 import conditionals
 
 from ast import literal_eval
+from collections import deque
+from collections import OrderedDict
 from ConfigParser import RawConfigParser
 from functools import partial
-from random import seed
+from multiprocessing import Pool
+from os import getpid
+from os.path import splitext
 from random import getrandbits
 from random import randint
+from random import random as randomFloat
+from random import SystemRandom
 
-# OS seed
-seed
+import numpy
+import sys
 
 class Configuration():
    """Configuration that the generator reads
    """
 
-   def __init__(self, configFile):
+   # number of instances that get generated (and written) at once
+   defaultBatchSize = 4096
+
+   def __init__(self, configFile, **overrides):
       """Reads a configuration file and sets the configuration based on its
          contents
 
       Args:
          configFile (str): data generation configuration. For samples see the
-                           ``conf`` folder
+                           ``conf`` folder. An already read configuration
+                           (a :class:`RawConfigParser`) can be given too,
+                           which is copied
+         overrides: options of the ``global`` section that take precedence
+                    over the ones in the file (eg. given in the command line)
 
       """
-      self.parseConfigurationFile(configFile)
+      self.parseConfigurationFile(configFile, **overrides)
+
+   @staticmethod
+   def fromOptions(options):
+      """Creates a configuration from the options of its ``global`` section,
+         without any file
+
+      Args:
+         options (dict): values of the options, by name
 
-   def parseConfigurationFile(self, configFile):
+      """
+      parser = RawConfigParser()
+      parser.add_section('global')
+
+      for option, value in options.items():
+         parser.set('global', option, str(value))
+
+      return Configuration(parser)
+
+   def options(self):
+      """Returns the options of the ``global`` section, by name
+      """
+      return dict(self.parser.items('global'))
+
+   def derive(self, **overrides):
+      """Returns a new configuration made of this one's options and the given
+         ones, which take precedence
+      """
+      return Configuration(self.parser, **overrides)
+
+   def close(self):
+      """Releases the files the items of the configuration hold open (the
+         values files of ``value_list`` types, see
+         :class:`datagenerator.values.ValuesFile`)
+      """
+      for item in self.features + self.labels:
+         if isinstance(item.dataType.values, ValuesFile):
+            item.dataType.values.close()
+
+   def parseConfigurationFile(self, configFile, **overrides):
       """Reads a configuration file and sets the configuration values based on
          its contents
 
       Args:
          configFile (str): data generation configuration. For samples see the
                            ``conf`` folder
+         overrides: options of the ``global`` section that take precedence
+                    over the ones in the file
 
       Raises:
          Exception: if the configuration is in a bad shape (check examples)
@@ -47,8 +108,32 @@ class Configuration():
       """
       parser = Configuration.validate(configFile)
 
+      for option, value in overrides.items():
+         parser.set('global', option, str(value))
+
       self.dataPoints = parser.getint('global', 'data_points')
 
+      self.batchSize = Configuration.defaultBatchSize
+      if parser.has_option('global', 'batch_size'):
+         self.batchSize = parser.getint('global', 'batch_size')
+
+      if self.batchSize < 1:
+         raise Exception("'batch_size' should be a positive integer")
+
+      self.pipelineDepth = 0
+      if parser.has_option('global', 'pipeline_depth'):
+         self.pipelineDepth = parser.getint('global', 'pipeline_depth')
+
+      if self.pipelineDepth < 0:
+         raise Exception("'pipeline_depth' should be a non-negative integer")
+
+      self.seed = None
+      if parser.has_option('global', 'seed'):
+         self.seed = int(parser.get('global', 'seed'))
+
+         if self.seed < 0 or self.seed >= 1 << 64:
+            raise Exception("'seed' should be a non-negative 64-bit integer")
+
       self.features = []
       self.labels = []
 
@@ -62,6 +147,8 @@ class Configuration():
       self.readTypeAndDistribution(parser, "feature", featuresToRead)
       self.readTypeAndDistribution(parser, "label", labelsToRead)
       self.readOutputType(parser)
+      self.readTracing(parser)
+      self.readStats(parser)
       self.parser = parser
 
    def readTypeAndDistribution(self, parser, whatToRead, numOfItems):
@@ -87,7 +174,23 @@ class Configuration():
             raise Exception(
                   "expecting datatype for " + whatToRead + " " + str(i+1))
 
-         dataType = DataType(parser.get('global', option))
+         spec = parser.get('global', option)
+         option = whatToRead + "_" + str(i+1) + "_values_file"
+
+         if parser.has_option('global', option):
+            if "value_list" not in spec:
+               raise Exception("only 'value_list' data types take a values "
+                               "file")
+
+            dataType = DataType(spec, ValuesFile(
+                  parser.get('global', option).strip("'\"")))
+         else:
+            dataType = DataType(spec)
+
+         option = whatToRead + "_" + str(i+1) + "_alphabet"
+
+         if parser.has_option('global', option):
+            dataType.setAlphabet(parser.get('global', option))
 
          # read distribution
          option = whatToRead + "_" + str(i+1) + "_distribution"
@@ -148,8 +251,35 @@ class Configuration():
          distribution.addParameter(i, parameter)
 
 
+      if distribution.name == "weighted":
+         Configuration.readWeights(parser, whatToRead, attrNum, distribution)
+
       # TODO: read other parameters for other distributions
 
+   @staticmethod
+   def readWeights(parser, whatToRead, attrNum, distribution):
+      """Reads the weights of a ``weighted`` distribution, either given as
+         ``whatToRead_attrNum_weights`` (separated by commas) or in the file
+         ``whatToRead_attrNum_weights_file``
+
+      Raises:
+         Exception: if none or both are given
+      """
+      option = whatToRead + "_" + str(attrNum) + "_weights"
+      inline = parser.has_option('global', option)
+      inFile = parser.has_option('global', option + "_file")
+
+      if inline == inFile:
+         raise Exception(
+               "expecting either weights or a weights file for " +
+               whatToRead + ": " + str(attrNum))
+
+      if inline:
+         distribution.addParameter(0, parser.get('global', option))
+      else:
+         distribution.addParameter(
+               1, parser.get('global', option + "_file").strip("'\""))
+
    def readOutputType(self, parser):
       """Reads the type of output and filename of output. Valid values is
          ``csv`` or ``arff``.
@@ -169,6 +299,63 @@ class Configuration():
 
       self.outputFile = parser.get('global', 'output_file')
 
+   def readTracing(self, parser):
+      """Reads the tracing options (see :mod:`datagenerator.tracing`)::
+
+            trace = off | info | debug
+            trace_file = somefile          # stderr if not given
+            trace_sample = 0.01            # fraction of values traced
+            feature_1_trace_sample = 1     # per-item sampling rate
+
+      Raises:
+         Exception: if the tracing level or a sampling rate is wrong
+
+      """
+      level = "off"
+      if parser.has_option('global', 'trace'):
+         level = parser.get('global', 'trace')
+
+      fileName = None
+      if parser.has_option('global', 'trace_file'):
+         fileName = parser.get('global', 'trace_file')
+
+      sample = 0.0
+      if parser.has_option('global', 'trace_sample'):
+         sample = parser.getfloat('global', 'trace_sample')
+
+      itemSamples = {}
+
+      for whatToRead, items in [("feature", self.features),
+                                ("label", self.labels)]:
+         for i, item in enumerate(items):
+            option = whatToRead + "_" + str(i+1) + "_trace_sample"
+
+            if parser.has_option('global', option):
+               itemSamples[item.name] = parser.getfloat('global', option)
+
+      self.tracer = Tracer(level, fileName, sample, itemSamples)
+
+   def readStats(self, parser):
+      """Reads the profiling options (see :mod:`datagenerator.stats`)::
+
+            stats = true                   # summary written to stderr
+            stats_file = somefile.json     # report written as JSON
+
+         Counters are only enabled if any of them is given
+      """
+      self.stats = None
+      self.statsSummary = False
+      self.statsFile = None
+
+      if parser.has_option('global', 'stats'):
+         self.statsSummary = parser.getboolean('global', 'stats')
+
+      if parser.has_option('global', 'stats_file'):
+         self.statsFile = parser.get('global', 'stats_file')
+
+      if self.statsSummary or self.statsFile is not None:
+         self.stats = Stats()
+
    @staticmethod
    def validate(configFile):
       """Validates that a configuration file is correct. For an example of a
@@ -179,7 +366,15 @@ class Configuration():
 
       """
       parser = RawConfigParser()
-      parser.read(configFile)
+
+      if isinstance(configFile, RawConfigParser):
+         for section in configFile.sections():
+            parser.add_section(section)
+
+            for option, value in configFile.items(section):
+               parser.set(section, option, value)
+      else:
+         parser.read(configFile)
 
       if not parser.has_section('global'):
          raise Exception("missing 'global' section")
@@ -196,54 +391,706 @@ class Configuration():
 
 class DataGenerator():
    @staticmethod
-   def generate(confFile):
-      c = Configuration(confFile)
-      g = InstanceGenerator(c)
+   def generate(confFile, workers=1, shardFiles=False, seed=None,
+                **overrides):
+      """Generates the data described by a configuration file and writes it
+         to the configured output.
+
+      Args:
+         confFile (str): data generation configuration (or an already read
+                         one, see :class:`Configuration`)
+         workers (int): number of processes generating the data. The output
+                        is the same regardless of the number of workers
+         shardFiles (bool): when generating with more than one worker, write
+                            one file per worker (see :meth:`shardFileName`)
+                            instead of merging everything in the configured
+                            output file
+         seed (int): seed of the random numbers. If not given, the one of the
+                     configuration is used or, if there's none, a new one is
+                     obtained from the OS
+         overrides: options that take precedence over the ones in the file
+
+      """
+      c = Configuration(confFile, **overrides)
+
+      if seed is None:
+         seed = c.seed
+
+      if seed is None:
+         seed = InstanceGenerator.newSeed()
+
+      if workers > 1:
+         DataGenerator.generateSharded(c, confFile, overrides, seed, workers,
+                                       shardFiles)
+         c.close()
+         return
+
+      g = InstanceGenerator(c, seed)
       w = WriterFactory.create(**dict(c.parser.items('global')))
+      batches = g.generateBatches(c.dataPoints)
+
+      if c.stats is not None:
+         c.stats.wrapWriter(w)
+
+      if c.pipelineDepth > 0:
+         # batches get generated in a thread of their own, while the
+         # previous ones are formatted and written
+         batches = Prefetcher(batches, c.pipelineDepth)
 
       w.open()
-      for _ in range(c.dataPoints):
-         w.write(g.generateNext())
+      for batch in batches:
+         w.writeBatch(batch)
       w.close()
 
+      DataGenerator.reportPipeline(c, batches)
+      c.tracer.close()
+      c.close()
+      DataGenerator.reportStats(c)
+
+   @staticmethod
+   def generateVariants(configs, seed):
+      """Generates the data of several configurations that only differ in
+         their labels (and output). The features of every batch are
+         generated once and shared by all the configurations, which only
+         generate their labels: as the random numbers of an item only depend
+         on the seed, its position and the instance (see
+         :mod:`datagenerator.rng`), the data is the same as generating each
+         configuration on its own.
+
+      Args:
+         configs (list): the configurations
+         seed (int): seed of the random numbers
+
+      Raises:
+         Exception: if the configurations differ in their features or number
+                    of data points
+
+      """
+      first = configs[0]
+
+      for c in configs[1:]:
+         if c.dataPoints != first.dataPoints or \
+            map(DataGenerator.featureSpec, c.features) != \
+            map(DataGenerator.featureSpec, first.features):
+            raise Exception("configurations differ in more than their labels")
+
+      plans = [GenerationPlan(c) for c in configs]
+      writers = [WriterFactory.create(**c.options()) for c in configs]
+      traces = [c.tracer.hook("info") for c in configs]
+      features = len(first.features)
+
+      for c, w in zip(configs, writers):
+         if c.stats is not None:
+            c.stats.wrapWriter(w)
+
+      def generateVariantBatches():
+         for start in xrange(0, first.dataPoints, first.batchSize):
+            size = min(first.batchSize, first.dataPoints - start)
+
+            for trace in traces:
+               if trace is not None:
+                  trace("generating instances " + str(start) + " to " +
+                        str(start + size - 1))
+
+            batch = plans[0].run(start, size, seed)
+
+            yield [batch] + [plan.run(start, size, seed,
+                                      batch.columns[:features])
+                             for plan in plans[1:]]
+
+      variants = generateVariantBatches()
+
+      if first.pipelineDepth > 0:
+         # see :meth:`generate`
+         variants = Prefetcher(variants, first.pipelineDepth)
+
+      opened = []
+
+      try:
+         for w in writers:
+            w.open()
+            opened.append(w)
+
+         for batches in variants:
+            for w, batch in zip(writers, batches):
+               w.writeBatch(batch)
+      except BaseException:
+         # the writers get closed, but the error raised is the original one
+         error = sys.exc_info()
+
+         for w in opened:
+            try:
+               w.close()
+            except Exception:
+               pass
+
+         raise error[0], error[1], error[2]
+
+      for w in writers:
+         w.close()
+
+      for c in configs:
+         DataGenerator.reportPipeline(c, variants)
+         c.tracer.close()
+         DataGenerator.reportStats(c)
+
+   @staticmethod
+   def featureSpec(feature):
+      return (feature.dataType.name, feature.dataType.size,
+              feature.dataType.values, feature.dataType.alphabet,
+              feature.distribution.name, feature.distribution.parameters)
+
+   @staticmethod
+   def reportPipeline(c, batches):
+      """Traces and counts (if enabled) the time the generator and the
+         writer of a pipelined generation, if ``batches`` were generated by a
+         :class:`Prefetcher`
+      """
+      if not isinstance(batches, Prefetcher):
+         return
+
+      trace = c.tracer.hook("info")
+
+      if trace is not None:
+         trace("generator stalled %.3fs, writer stalled %.3fs" %
+               (batches.producerStall, batches.consumerStall))
+
+      if c.stats is not None:
+         c.stats.recordStalls(batches.producerStall, batches.consumerStall)
+
+   @staticmethod
+   def reportStats(c):
+      """Writes the profiling counters (if enabled) of a generation that
+         just finished, as configured (see :meth:`Configuration.readStats`)
+      """
+      if c.stats is None:
+         return
+
+      if c.statsSummary:
+         sys.stderr.write(c.stats.summary())
+
+      if c.statsFile is not None:
+         c.stats.save(c.statsFile)
+
+   @staticmethod
+   def stream(config, batchSize=None, prefetch=2, seed=None):
+      """Generates the data described by a configuration as an iterator of
+         :class:`datagenerator.core.Batch`, holding at most ``prefetch``
+         batches in memory besides the one being consumed (see
+         :meth:`InstanceGenerator.stream`).
+
+      Args:
+         config (Configuration): data generation configuration
+         batchSize (int): size of the batches. The configured one by default
+         prefetch (int): number of batches generated ahead of the consumer
+         seed (int): seed of the random numbers (see :meth:`generate`)
+
+      """
+      return InstanceGenerator(config, seed).stream(
+            batchSize, prefetch=prefetch)
+
+   @staticmethod
+   def arrays(config, seed=None):
+      """Generates the data described by a configuration in memory, without
+         writing anything.
+
+      Args:
+         config (Configuration): data generation configuration
+         seed (int): seed of the random numbers (see :meth:`generate`)
+
+      Returns:
+         an ``OrderedDict`` with a NumPy array per feature and label, in
+         order and named as in the output files (``feature1``, ...,
+         ``label1``, ...), holding their values as described in
+         :meth:`datagenerator.core.DataType.allocate`
+
+      """
+      g = InstanceGenerator(config, seed)
+      data = Batch(0, config.dataPoints, g.schema)
+
+      for batch in g.generateBatches(config.dataPoints):
+         end = batch.start + len(batch)
+
+         for column, values in zip(data.columns, batch.columns):
+            column[batch.start:end] = values
+
+      return OrderedDict(zip(Writer.columnNames(data.schema), data.columns))
+
+   @staticmethod
+   def dataFrame(config, seed=None):
+      """Generates the data described by a configuration in memory, as a
+         pandas ``DataFrame`` with a column per feature and label (see
+         :meth:`arrays`). ``value_list`` items become categorical columns and
+         ``binary`` ones hold the integer value of their bits.
+
+      Raises:
+         Exception: if pandas isn't installed
+
+      """
+      try:
+         import pandas
+      except ImportError:
+         raise Exception("generating a DataFrame requires pandas")
+
+      columns = DataGenerator.arrays(config, seed)
+
+      for name, item in zip(columns.keys(), config.features + config.labels):
+         dataType = item.dataType
+
+         if dataType.name == "value_list":
+            columns[name] = pandas.Categorical.from_codes(
+                  columns[name], list(dataType.values))
+         elif dataType.shape:
+            columns[name] = map(dataType.decode, columns[name])
+
+      return pandas.DataFrame(columns, columns=columns.keys())
+
+   @staticmethod
+   def generateSharded(c, confFile, overrides, seed, workers, shardFiles):
+      """Generates the data of a configuration in a pool of processes. The
+         random numbers of an instance only depend on the seed and on its
+         number (see :mod:`datagenerator.rng`), so every worker generates
+         exactly what a single process would have.
+
+      Args:
+         c (Configuration): the configuration read from ``confFile``
+         confFile (str): data generation configuration
+         overrides (dict): options that take precedence over the file ones
+         seed (int): seed of the random numbers
+         workers (int): number of processes
+         shardFiles (bool): whether every worker writes its own file
+
+      """
+      # the plan and the writer get built here first, so that errors in the
+      # configuration are raised instead of failing the initialization of
+      # every worker (which the pool restarts forever)
+      InstanceGenerator(c, seed)
+      w = WriterFactory.create(**dict(c.parser.items('global')))
+
+      pool = Pool(workers, initializeWorker, (confFile, overrides, seed))
+
+      try:
+         if shardFiles:
+            stats = pool.map(writeShard, list(enumerate(
+                  DataGenerator.shards(c.dataPoints, c.batchSize, workers))))
+
+            if c.stats is not None:
+               map(c.stats.merge, stats)
+         else:
+            schema = Schema(c.features, c.labels)
+            pending = deque()
+
+            if c.stats is not None:
+               c.stats.wrapWriter(w)
+
+            w.open()
+
+            # batches are generated (and formatted, see
+            # :func:`generateShardBatch`) in order, with at most two of them
+            # per worker waiting to be written
+            for batchStart in xrange(0, c.dataPoints, c.batchSize):
+               if len(pending) == 2 * workers:
+                  DataGenerator.writeShardBatch(
+                        w, schema, c.stats, pending.popleft().get())
+
+               pending.append(pool.apply_async(
+                     generateShardBatch,
+                     (batchStart, min(c.batchSize, c.dataPoints - batchStart))))
+
+            while pending:
+               DataGenerator.writeShardBatch(
+                     w, schema, c.stats, pending.popleft().get())
+
+            w.close()
+      finally:
+         pool.close()
+         pool.join()
+
+      DataGenerator.reportStats(c)
+
+   @staticmethod
+   def writeShardBatch(w, schema, stats, result):
+      """Writes a batch generated by a worker (see
+         :func:`generateShardBatch`) and merges the worker's counters
+      """
+      start, size, block, workerStats = result
+
+      if stats is not None:
+         stats.merge(workerStats)
+
+      if hasattr(w, "formatBatch"):
+         w.writeFormatted(Batch(start, size, schema, []), block)
+      else:
+         w.writeBatch(Batch(start, size, schema, block))
+
+   @staticmethod
+   def shards(dataPoints, batchSize, count):
+      """Splits ``dataPoints`` instances in at most ``count`` ranges made of
+         whole batches
+
+      Returns:
+         a list of ``(start, size)`` tuples
+
+      """
+      batches = (dataPoints + batchSize - 1) // batchSize
+      shards = []
+
+      for n in range(count):
+         start = batches * n // count * batchSize
+         end = min(batches * (n + 1) // count * batchSize, dataPoints)
+
+         if end > start:
+            shards.append((start, end - start))
+
+      return shards
+
+   @staticmethod
+   def shardFileName(fileName, shard):
+      """Returns the name of the output file of a shard, eg. ``out.3.csv`` for
+         the fourth shard of ``out.csv``
+      """
+      root, extension = splitext(fileName)
+
+      return root + "." + str(shard) + extension
+
+# the generator of a process of the pool used by
+# :meth:`DataGenerator.generateSharded`, and the writer formatting its
+# batches
+workerGenerator = None
+workerWriter = None
+
+def initializeWorker(confFile, overrides, seed):
+   global workerGenerator, workerWriter
+
+   c = Configuration(confFile, **overrides)
+
+   if c.parser.has_option('global', 'trace_file'):
+      c.tracer.fileName += "." + str(getpid())
+
+   workerGenerator = InstanceGenerator(c, seed)
+   workerWriter = WriterFactory.create(**dict(c.parser.items('global')))
+
+   if c.stats is not None:
+      c.stats.wrapWriter(workerWriter)
+
+def generateShardBatch(start, size):
+   """Returns the batch of the given range as ``(start, size, block,
+      stats)``, where ``block`` is the text of the batch if the output gets
+      formatted (see :meth:`datagenerator.writers.CSVWriter.formatBatch`),
+      so that only writing it is left to the parent process, or its columns
+      otherwise. The schema isn't sent back. ``stats`` are the counters of
+      the worker since its previous batch, if enabled
+   """
+   batch = workerGenerator.newBatch(start, size)
+
+   if hasattr(workerWriter, "formatBatch"):
+      block = workerWriter.formatBatch(batch)
+   else:
+      block = batch.columns
+
+   return batch.start, batch.length, block, takeWorkerStats()
+
+def takeWorkerStats():
+   stats = workerGenerator.config.stats
+
+   if stats is None:
+      return None
+
+   return stats.take()
+
+def writeShard(shard):
+   n, (start, size) = shard
+   c = workerGenerator.config
+
+   options = dict(c.parser.items('global'))
+   options['output_file'] = DataGenerator.shardFileName(c.outputFile, n)
+   options['data_points'] = str(size)
+
+   w = WriterFactory.create(**options)
+
+   if c.stats is not None:
+      c.stats.wrapWriter(w)
+
+   workerGenerator.counter = start
+
+   w.open()
+   for batch in workerGenerator.generateBatches(size):
+      w.writeBatch(batch)
+   w.close()
+
+   return takeWorkerStats()
 
 class InstanceGenerator():
-   def __init__(self, config):
+   def __init__(self, config, seed=None):
       """Creates an instance generator with given configuration
 
       Args:
          config (Configuration): initial configuration.
+         seed (int): seed of the random numbers. If not given, the one of the
+                     configuration is used or, if there's none, a new one is
+                     obtained from the OS
 
       """
+      if seed is None:
+         seed = config.seed
+
+      if seed is None:
+         seed = InstanceGenerator.newSeed()
+
       self.config = config
+      self.seed = seed
       self.counter = 0
+      self.plan = GenerationPlan(config)
+      self.schema = self.plan.schema
+      self.current = Instance(
+            self.counter, config.features, config.labels, self.schema)
+      self.buffered = None
+      self.traceBatch = config.tracer.hook("info")
 
    def generateNext(self):
       """A next instance that complies with the specification given in the
-         config file.
+         config file. Instances are generated ahead in batches (see
+         :meth:`generateBatch`) and the one returned is a view of a row of the
+         batch. The view is a buffer that gets reused by the next call, so
+         it's only valid until then.
       """
-      self.current = Instance(
-            self.counter, self.config.features, self.config.labels)
-
-      for f in self.config.features:
-         self.current.assign(f, self.generate(f.dataType, f.distribution))
+      if self.buffered is None or \
+         self.counter >= self.buffered.start + len(self.buffered):
+         self.buffered = self.newBatch(self.counter, self.config.batchSize)
 
-      for l in self.config.labels:
-         # it's important that the features get generated first: labels with
-         # 'conditional' distribution depend on all features being present
-         self.current.assign(l, self.generate(l.dataType, l.distribution))
+      self.current = self.buffered.instance(
+            self.counter - self.buffered.start, self.current)
 
       self.counter += 1
 
       return self.current
 
+   def generateBatch(self, size):
+      """The next ``size`` instances, as a column-oriented :class:`Batch`
+
+      Args:
+         size (int): number of instances to generate
+
+      """
+      batch = self.newBatch(self.counter, size)
+
+      self.counter += size
+      self.buffered = None
+
+      return batch
+
+   def generateBatches(self, count, size=None):
+      """Generates the next ``count`` instances in batches
+
+      Args:
+         count (int): number of instances to generate
+         size (int): size of the batches. The configured one by default
+
+      """
+      if size is None:
+         size = self.config.batchSize
+
+      while count > 0:
+         batch = self.generateBatch(min(count, size))
+         count -= len(batch)
+         yield batch
+
+   def stream(self, size=None, count=None, prefetch=2):
+      """Generates the next ``count`` instances in batches, lazily: at most
+         ``prefetch`` batches are generated ahead (in a background thread)
+         of the ones consumed, so memory doesn't depend on ``count``. The
+         generator advances as batches get generated.
+
+      Args:
+         size (int): size of the batches. The configured one by default
+         count (int): number of instances to generate. By default, the
+                      configured number of data points
+         prefetch (int): number of batches generated ahead. With ``0``,
+                         batches are generated on demand, in the calling
+                         thread
+
+      """
+      if count is None:
+         count = self.config.dataPoints
+
+      batches = self.generateBatches(count, size)
+
+      if prefetch == 0:
+         return batches
+
+      return iter(Prefetcher(batches, prefetch))
+
+   def newBatch(self, start, size):
+      """Generates ``size`` instances numbered from ``start`` on, without
+         changing the state of the generator (see :meth:`GenerationPlan.run`).
+         An instance is always generated the same way for a given seed,
+         regardless of the batch it's part of.
+
+      Args:
+         start (int): number of the first instance
+         size (int): number of instances to generate
+
+      """
+      if self.traceBatch is not None:
+         self.traceBatch("generating instances " + str(start) + " to " +
+                         str(start + size - 1))
+
+      return self.plan.run(start, size, self.seed)
+
+   @staticmethod
+   def newSeed():
+      """Returns a new 64-bit seed, obtained from the OS
+      """
+      return SystemRandom().getrandbits(64)
+
    def generate(self, dataType, distribution):
       return ValueGenerator.getFunction(distribution)(dataType, self.current)
 
+class GenerationPlan():
+   """The generation of every item of a configuration, resolved once: each
+      item is bound to a sampler with its arguments already parsed and
+      validated, so that generating a batch doesn't do any lookup.
+
+      Samplers come in two flavors. Column samplers get called with the
+      :class:`Batch` being generated and a source of random numbers (a
+      :class:`datagenerator.rng.CounterRandom` of the item's own stream, or
+      anything implementing the same part of :class:`numpy.random.
+      RandomState`) and return the whole column of the item. Value samplers
+      get called with an :class:`Instance` (whose previous items are already
+      assigned) and a :class:`datagenerator.rng.RowRandom` of the item's
+      stream, at the row of the instance, and return the value of the item
+      for it.
+
+      Items are grouped in stages of consecutive items of the same flavor,
+      which run in order: it's important that the features get generated
+      first, labels with 'conditional' distribution depend on them.
+   """
+
+   def __init__(self, config):
+      """Compiles the plan of the given configuration
+
+      Args:
+         config (Configuration): the configuration
+
+      Raises:
+         Exception: if an item can't be generated (eg. unknown conditional
+                    or unsupported distribution) or if the arguments of a
+                    conditional are wrong
+
+      """
+      self.schema = Schema(config.features, config.labels)
+      self.row = Instance(0, None, None, self.schema)
+      self.stages = []
+
+      for n, item in enumerate(self.schema.items):
+         byColumn, sampler = GenerationPlan.compile(item, self.schema)
+
+         if byColumn:
+            if config.stats is not None:
+               sampler = config.stats.wrapColumnSampler(item, sampler)
+
+            sampler = config.tracer.wrapColumnSampler(item, sampler)
+         else:
+            if config.stats is not None:
+               sampler = config.stats.wrapValueSampler(item, sampler)
+
+            sampler = config.tracer.wrapValueSampler(item, sampler)
+
+         if not self.stages or self.stages[-1][0] != byColumn:
+            self.stages.append((byColumn, []))
+
+         self.stages[-1][1].append((n, sampler))
+
+   @staticmethod
+   def compile(item, schema):
+      """Binds the given item to its sampler
+
+      Args:
+         item (InstanceItem): the feature or label
+         schema (Schema): the schema the item is part of
+
+      Returns:
+         whether the sampler is a column sampler, and the sampler
+
+      """
+      dataType = item.dataType
+      distribution = item.distribution
+
+      if distribution.name == "conditional":
+         conditionalFunc, conditionalArgs \
+            = ValueGenerator.resolveConditional(distribution)
+
+         # a conditional gets generated by column if the conditionals module
+         # has a column-level version of it (named '<conditional>Column')
+         columnFunc = getattr(
+               conditionals, distribution.parameters[0] + "Column", None)
+
+         if columnFunc is not None:
+            return True, columnFunc(conditionalArgs, dataType, schema)
+
+         return False, partial(conditionalFunc, conditionalArgs, dataType)
+      else:
+         return True, ValueGenerator.columnSampler(dataType, distribution)
+
+   def run(self, start, size, seed, reused=None):
+      """Generates ``size`` instances numbered from ``start`` on. Items left
+         unassigned by their value sampler (eg. ``dummyConditional``) keep
+         the zero of their column.
+
+      Args:
+         start (int): number of the first instance
+         size (int): number of instances to generate
+         seed (int): seed of the random numbers
+         reused (list): columns of the first items of these instances, for
+                        the same seed, that are reused instead of generated
+                        (eg. the features shared by configurations that only
+                        differ in their labels). The rest of the items are
+                        generated exactly as they would have been
+
+      """
+      reused = reused or []
+      batch = Batch(start, size, self.schema)
+      columns = batch.columns
+      columns[:len(reused)] = reused
+      items = self.schema.items
+      generated = range(len(reused))
+
+      for byColumn, samplers in self.stages:
+         samplers = [(n, sampler) for n, sampler in samplers
+                     if n >= len(reused)]
+
+         if byColumn:
+            for n, sampler in samplers:
+               columns[n] = sampler(batch, CounterRandom(seed, n, start))
+         else:
+            row = self.row
+            values = row.itemValues
+            sources = [RowRandom(seed, n) for n, _ in samplers]
+
+            for r in range(size):
+               row.reset(start + r)
+
+               for n in generated:
+                  values[n] = items[n].dataType.decode(columns[n][r])
+
+               for (n, sampler), source in zip(samplers, sources):
+                  source.reset(start + r)
+                  value = sampler(row, source)
+
+                  if value is not None:
+                     values[n] = value
+                     columns[n][r] = items[n].dataType.encode(value)
+
+         generated.extend(n for n, _ in samplers)
+
+      return batch
+
 class ValueGenerator():
    """
       Utility class that generate values in their string representation.
    """
+   # distributions of real values, discretized onto the data types
+   continuousDistributions = ("gamma", "beta", "log-normal")
 
    @staticmethod
    def getFunction(distribution):
@@ -256,24 +1103,113 @@ class ValueGenerator():
       """
       if distribution.name == "uniform":
          return ValueGenerator.generateUniform
-      elif distribution.name == "beta":
-         return partial(ValueGenerator.generateBeta, distribution.parameters)
       elif distribution.name == "conditional":
-         conditionalName = distribution.parameters[0]
-         conditionalFunc = getattr(conditionals, conditionalName)
-         conditionalArgs \
-            = literal_eval(str(literal_eval(distribution.parameters[1])))
-
-         return partial(conditionalFunc, conditionalArgs)
+         return partial(ValueGenerator.generateConditional,
+                        *ValueGenerator.resolveConditional(distribution))
+      elif distribution.name in ValueGenerator.continuousDistributions or \
+           distribution.name in ("weighted", "roundrobin"):
+         return partial(ValueGenerator.generateSampled, distribution)
       else:
          raise Exception("unsupported distribution " + distribution.name)
 
+   @staticmethod
+   def generateConditional(conditionalFunc, conditionalArgs, dataType,
+                           instance=None):
+      """
+         Generates the value of an instance with a conditional, drawing its
+         random numbers from a stream of its own (like
+         :meth:`generateSampled`)
+      """
+      random = RowRandom(getrandbits(64))
+      random.reset(instance.number if instance is not None else 0)
+
+      return conditionalFunc(conditionalArgs, dataType, instance, random)
+
+   @staticmethod
+   def resolveConditional(distribution):
+      """
+         Returns the function of the conditionals module named by the first
+         parameter of a ``conditional`` distribution and the arguments given
+         by its second parameter
+
+      Raises:
+         Exception: if the conditional doesn't exist
+      """
+      conditionalName = distribution.parameters[0]
+      conditionalFunc = getattr(conditionals, conditionalName, None)
+
+      if conditionalFunc is None:
+         raise Exception("unknown conditional " + conditionalName)
+
+      conditionalArgs \
+         = literal_eval(str(literal_eval(distribution.parameters[1])))
+
+      return conditionalFunc, conditionalArgs
+
+   @staticmethod
+   def uniformSampler(dataType):
+      """
+         Returns a column sampler (see :class:`GenerationPlan`) that generates
+         values from a uniform distribution, in the layout given by
+         :meth:`datagenerator.core.DataType.allocate`. The range of the data
+         type is calculated once, here.
+      """
+      dtype = dataType.dtype
+
+      if dataType.name == "binary" and dataType.shape:
+         width = dataType.shape[0]
+         leadingBits = (1 << (dataType.size - 1) % 8 + 1) - 1
+
+         def sample(batch, random):
+            # packed bits; the leading byte only keeps the bits within range
+            column = ValueGenerator.randomBytes(random, len(batch), width)
+            column[:, 0] &= leadingBits
+            return column
+
+         return sample
+      elif dataType.name == "string":
+         return ValueGenerator.stringSampler(dataType)
+      elif dataType.isFloat():
+         def sample(batch, random):
+            # 24 bits (the precision of float32) or 53, so that values never
+            # get rounded up to 1
+            column = random.random_sample(len(batch))
+
+            if dtype.itemsize == 4:
+               column = numpy.floor(column * 16777216) / 16777216
+
+            return column.astype(dtype)
+
+         return sample
+      elif dataType.name == "binary":
+         low, high = 0, 1 << dataType.size
+      elif dataType.name == "int32":
+         low, high = -2147483648, 2147483648
+      elif dataType.name == "int":
+         low, high = 0, dataType.values
+      elif dataType.name == "value_list":
+         low, high = 0, len(dataType.values)
+      else:
+         raise Exception("data type " + dataType.name + " not supported yet")
+
+      def sample(batch, random):
+         return random.randint(low, high, len(batch), dtype=dtype)
+
+      return sample
+
+   @staticmethod
+   def generateUniformColumn(dataType, batch, random):
+      """
+         Generates a column of values from a uniform distribution, in the
+         layout given by :meth:`datagenerator.core.DataType.allocate`
+      """
+      return ValueGenerator.uniformSampler(dataType)(batch, random)
+
    @staticmethod
    def generateUniform(dataType, instance=None):
       """
          Generates values from a uniform distribution
       """
-      print "generating value of type " + dataType.name
       if dataType.name == "binary":
          return "{0:b}".format(getrandbits(dataType.size))
       elif dataType.name == "int32":
@@ -281,22 +1217,354 @@ class ValueGenerator():
       elif dataType.name == "int":
          return randint(0, dataType.values)
       elif dataType.name == "value_list":
-         r = randint(0, len(dataType.values)-1)
-         print "   value list " + ('[%s]' % ', '.join(map(str, dataType.values)))
-         print " generated index: " + str(r)
-         print " generated value: " + dataType.values[r]
-         return dataType.values[r]
+         return dataType.values[randint(0, len(dataType.values)-1)]
+      elif dataType.isFloat():
+         return float(dataType.dtype.type(randomFloat()))
+      elif dataType.name == "string":
+         sample = ValueGenerator.stringSampler(dataType)
+         random = CounterRandom(getrandbits(64))
+
+         return dataType.decode(sample(Batch(0, 1, Schema([], [])), random)[0])
       else:
          raise Exception("data type " + dataType.name + " not supported yet")
 
    @staticmethod
-   def generateBeta(parameters, dataType, instance=None):
+   def stringSampler(dataType, lengths=None):
       """
-         Generates values from a uniform distribution
+         Returns a column sampler (see :class:`GenerationPlan`) of strings
+         made of the characters of the alphabet of the data type, uniformly
+         distributed. The characters of a whole batch are drawn at once: a
+         buffer of random bytes, two per character, is mapped onto the
+         alphabet through a table (of all the values of two bytes, so the
+         bias of a character is less than ``len(alphabet) / 2^16``) and
+         sliced into strings (see :meth:`randomBytes`).
+
+      Args:
+         dataType (DataType): a ``string(n)`` type
+         lengths: a column sampler of the length of every string, in the
+                  [0, n] range. All the strings are n characters long if not
+                  given
+
       """
-      if dataType.name == "binary":
-         raise Exception("can't handle binary yet")
+      size = dataType.size
+      dtype = dataType.dtype
+
+      if size == 0:
+         return lambda batch, random: dataType.allocate(len(batch))
+
+      alphabet = numpy.frombuffer(dataType.alphabet, numpy.uint8)
+      table = alphabet[(numpy.arange(65536) * len(alphabet)) >> 16]
+      positions = numpy.arange(size)
+
+      def sample(batch, random):
+         rows = len(batch)
+         codes = ValueGenerator.randomBytes(random, rows, 2 * size) \
+               .view(numpy.uint16)
+         characters = table[codes]
+
+         if lengths is not None:
+            # unused characters are NULs, which strings of the column drop
+            characters[positions >= lengths(batch, random)[:, None]] = 0
+
+         return characters.view(dtype).reshape(rows)
+
+      return sample
+
+   @staticmethod
+   def randomBytes(random, rows, width):
+      """
+         Returns a writable ``(rows, width)`` array of random bytes, from
+         ``randomBytes`` of a :class:`datagenerator.rng.CounterRandom` or
+         from ``bytes`` of other sources of random numbers (eg. a
+         ``numpy.random.RandomState``)
+      """
+      if hasattr(random, "randomBytes"):
+         return random.randomBytes((rows, width))
+
+      return numpy.frombuffer(bytearray(random.bytes(rows * width)),
+                              numpy.uint8).reshape(rows, width)
+
+   @staticmethod
+   def continuousSampler(dataType, distribution):
+      """
+         Returns a column sampler (see :class:`GenerationPlan`) that generates
+         values from a gamma, beta or log-normal distribution, given by its
+         two parameters::
+
+            gamma      -- shape and scale
+            beta       -- alpha and beta
+            log-normal -- mean and standard deviation of the underlying
+                          normal distribution
+
+         and discretizes them onto the data type (see :meth:`discretizer`).
+         For ``string(n)`` types, the values are the lengths of the strings
+         (see :meth:`stringSampler`), discretized onto ``int(n)``.
+
+      Raises:
+         Exception: if the parameters are wrong or the data type can't hold
+                    values of the distribution
+      """
+      name = distribution.name
+
+      if dataType.name == "string":
+         # the lengths of the strings follow the distribution
+         lengths = ValueGenerator.continuousSampler(
+               DataType("int(" + str(dataType.size) + ")"), distribution)
+         return ValueGenerator.stringSampler(dataType, lengths)
+
+      try:
+         first, second = [float(distribution.parameters[n]) for n in (0, 1)]
+      except (KeyError, ValueError):
+         raise Exception("the " + name + " distribution expects two numeric "
+                         "parameters")
+
+      if (name != "log-normal" and first <= 0) or second <= 0:
+         raise Exception("invalid parameters for the " + name +
+                         " distribution: " + str(first) + ", " + str(second))
+
+      if name == "gamma":
+         def values(random, size):
+            return random.standard_gamma(first, size) * second
+      elif name == "beta":
+         def values(random, size):
+            x = random.fork().standard_gamma(first, size)
+            y = random.fork().standard_gamma(second, size)
+
+            with numpy.errstate(invalid='ignore'):
+               return numpy.where(x + y > 0, x / (x + y), 0.5)
+      else:
+         def values(random, size):
+            return numpy.exp(first + second * random.standard_normal(size))
+
+      discretize = ValueGenerator.discretizer(dataType, name == "beta", name)
+
+      def sample(batch, random):
+         return discretize(values(random, len(batch)))
+
+      return sample
+
+   @staticmethod
+   def discretizer(dataType, bounded, distributionName):
+      """
+         Returns a function that maps floats onto a column of the given type.
+         Floating point types keep the values as they are. Otherwise, values
+         in [0, 1) (``bounded``, eg. from a beta distribution) are
+         scaled onto the whole range of the type, so that every value of the
+         type is one of equally wide bins of [0, 1). Unbounded values are
+         truncated to integers as they are, and saturate at the limits of
+         the type's range.
+
+         The range of every type is given by :meth:`valueRange`.
+
+      Raises:
+         Exception: if the type can't hold the values
+      """
+      if dataType.isFloat():
+         return lambda values: values.astype(dataType.dtype)
+
+      low, high = ValueGenerator.valueRange(dataType, distributionName)
+      dtype = dataType.dtype
+      scale = float(high - low)
+      # the largest float that still truncates within the range
+      top = numpy.nextafter(float(high), 0)
+
+      def discretize(values):
+         if bounded:
+            values = values * scale + low
+
+         return numpy.floor(numpy.clip(values, low, top)).astype(dtype)
+
+      return discretize
+
+   @staticmethod
+   def valueRange(dataType, distributionName):
+      """
+         Returns the range, ``[low, high)``, of the integers a column of the
+         given type holds: ``int32`` ranges from -2^31, ``int(n)`` from 0 to
+         n, ``binary(n)`` from 0 to 2^n - 1 (up to 64 bits) and
+         ``value_list`` covers the indexes of its values
+
+      Raises:
+         Exception: if the type doesn't hold integers
+      """
+      if dataType.name == "binary" and not dataType.shape:
+         return 0, 1 << dataType.size
       elif dataType.name == "int32":
-         raise Exception("can't handle integers yet")
+         return -2147483648, 2147483648
+      elif dataType.name == "int":
+         return 0, dataType.values
+      elif dataType.name == "value_list":
+         return 0, len(dataType.values)
       else:
-         raise Exception("data type " + dataType.name + " not supported yet")
+         raise Exception("data type " + dataType.name + " not supported by "
+                         "the " + distributionName + " distribution")
+
+   @staticmethod
+   def weightedSampler(dataType, distribution):
+      """
+         Returns a column sampler (see :class:`GenerationPlan`) that draws
+         every value of the type (eg. of a ``value_list``, see
+         :meth:`valueRange`) with a probability proportional to its weight.
+         Weights are given either by the first parameter of the distribution,
+         separated by commas, or by a file, the second parameter, of weights
+         separated by whitespace (eg. one per line).
+
+         Values are drawn with Walker's alias method (see :meth:`aliasTable`),
+         in constant time per value regardless of how many there are: a
+         single random number per value picks a slot of the table and whether
+         to take its value or its alias.
+
+      Raises:
+         Exception: if the weights are wrong or the data type can't hold the
+                    values
+      """
+      low, high = ValueGenerator.valueRange(dataType, distribution.name)
+      size = high - low
+
+      if 0 in distribution.parameters:
+         try:
+            weights = numpy.array(
+                  distribution.parameters[0].split(','), numpy.float64)
+         except ValueError:
+            raise Exception("invalid weights: " + distribution.parameters[0])
+      else:
+         try:
+            weights = numpy.fromfile(distribution.parameters[1], sep=' ')
+         except IOError as e:
+            raise Exception("can't read weights file " +
+                            distribution.parameters[1] + ": " + e.strerror)
+
+      if len(weights) != size:
+         raise Exception("expected " + str(size) + " weights, got " +
+                         str(len(weights)))
+
+      if not numpy.isfinite(weights).all() or (weights < 0).any() or \
+         weights.sum() == 0:
+         raise Exception("weights should be non-negative numbers, not all "
+                         "zero")
+
+      accept, alias = ValueGenerator.aliasTable(weights)
+      dtype = dataType.dtype
+
+      def sample(batch, random):
+         slots = random.random_sample(len(batch)) * size
+         values = numpy.minimum(slots.astype(numpy.int64), size - 1)
+         values = numpy.where(
+               slots - values < accept[values], values, alias[values])
+
+         return (values + low).astype(dtype)
+
+      return sample
+
+   @staticmethod
+   def aliasTable(weights):
+      """
+         Returns the tables of Walker's alias method for the given weights:
+         the probability of accepting every slot, and the alias taken
+         otherwise.
+
+         The table is built like in Vose's algorithm, where slots of values
+         above the average weight (large) give their excess to slots below it
+         (small), and a large slot that drops below the average becomes small
+         itself. Instead of pairing slots one by one, smalls are handed out
+         to larges in order, so the pairs are found at once by comparing the
+         running totals of what smalls lack and what larges have in excess.
+      """
+      n = len(weights)
+      probabilities = weights * (n / weights.sum())
+      accept = numpy.ones(n)
+      alias = numpy.arange(n)
+
+      small = numpy.flatnonzero(probabilities < 1)
+      large = numpy.flatnonzero(probabilities >= 1)
+
+      if len(small) == 0 or len(large) == 0:
+         return accept, alias
+
+      lacking = numpy.cumsum(1 - probabilities[small])
+      excess = numpy.cumsum(probabilities[large] - 1)
+
+      # every small goes to the first large with excess left when it comes
+      before = numpy.concatenate([[0.0], lacking[:-1]])
+      owners = numpy.minimum(
+            numpy.searchsorted(excess, before, 'left'), len(large) - 1)
+
+      accept[small] = probabilities[small]
+      alias[small] = large[owners]
+
+      # a large runs out with the first small it can't cover completely, and
+      # then the next large covers what it lacks
+      runsOut = numpy.searchsorted(lacking, excess[:-1], 'right')
+      ranOut = numpy.flatnonzero(runsOut < len(small))
+
+      accept[large[ranOut]] = 1 + excess[ranOut] - lacking[runsOut[ranOut]]
+      alias[large[ranOut]] = large[ranOut + 1]
+
+      return accept, alias
+
+   @staticmethod
+   def roundRobinSampler(dataType, distribution):
+      """
+         Returns a column sampler (see :class:`GenerationPlan`) that loops
+         through the values of the type (see :meth:`valueRange`), one per
+         instance: instance ``n`` gets the ``n``-th value, modulo their
+         number, whatever the batch it's generated in
+
+      Raises:
+         Exception: if the data type can't hold the values
+      """
+      low, high = ValueGenerator.valueRange(dataType, distribution.name)
+      size = high - low
+      dtype = dataType.dtype
+
+      def sample(batch, random):
+         numbers = numpy.arange(
+               batch.start, batch.start + len(batch), dtype=numpy.int64)
+
+         # values of binary(64) don't wrap around before 2^63 instances
+         if size < 1 << 63:
+            numbers %= size
+
+         return (numbers + low).astype(dtype)
+
+      return sample
+
+   @staticmethod
+   def columnSampler(dataType, distribution):
+      """
+         Returns the column sampler (see :class:`GenerationPlan`) of a data
+         type and a distribution that isn't ``conditional``
+
+      Raises:
+         Exception: if the distribution isn't supported
+      """
+      if distribution.name == "uniform":
+         return ValueGenerator.uniformSampler(dataType)
+      elif distribution.name in ValueGenerator.continuousDistributions:
+         return ValueGenerator.continuousSampler(dataType, distribution)
+      elif distribution.name == "weighted":
+         return ValueGenerator.weightedSampler(dataType, distribution)
+      elif distribution.name == "roundrobin":
+         return ValueGenerator.roundRobinSampler(dataType, distribution)
+      else:
+         raise Exception("unsupported distribution " + distribution.name)
+
+   @staticmethod
+   def generateSampled(distribution, dataType, instance=None):
+      """
+         Generates the value of an instance with the column sampler of a
+         distribution (see :meth:`columnSampler`). The sampler (eg. the
+         alias table of ``weighted``) is built once and kept by the
+         distribution, for the values of the same data type that follow
+      """
+      if getattr(distribution, 'sampledType', None) is not dataType:
+         distribution.sampledType = dataType
+         distribution.sampler = ValueGenerator.columnSampler(
+               dataType, distribution)
+
+      sample = distribution.sampler
+      number = instance.number if instance is not None else 0
+      random = CounterRandom(getrandbits(64), 0, number)
+
+      return dataType.decode(
+            sample(Batch(number, 1, Schema([], [])), random)[0])
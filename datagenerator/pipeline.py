@@ -0,0 +1,102 @@
+import sys
+import time
+
+from Queue import Full
+from Queue import Queue
+from threading import Event
+from threading import Thread
+
+"""
+   Producer/consumer plumbing. A :class:`Prefetcher` moves the production of
+   the items of an iterable (eg. generated batches) to a background thread
+   connected to the consumer by a queue, so that producing and consuming
+   overlap while memory stays bounded: the producer takes one of a fixed
+   number of slots before producing an item, and waits for the consumer to
+   free one when there's none left (backpressure).
+
+   The time each side spends waiting for the other is measured: a producer
+   that stalls a lot is faster than its consumer (eg. generating faster than
+   the disk can write), and the other way around.
+"""
+
+class Prefetcher():
+   """Iterates over an iterable, producing its items in a background thread
+      at most ``depth`` items ahead of the consumer
+   """
+
+   def __init__(self, iterable, depth=2):
+      """
+      Args:
+         iterable: the items to produce
+         depth (int): the maximum number of items produced but not consumed
+                      yet
+
+      Raises:
+         Exception: if the depth is less than one
+
+      """
+      if depth < 1:
+         raise Exception("the prefetch depth should be at least 1")
+
+      self.iterable = iterable
+      self.depth = depth
+      # seconds spent waiting for a free spot in the queue, and for an item
+      self.producerStall = 0.0
+      self.consumerStall = 0.0
+
+   def __iter__(self):
+      queue = Queue()
+      # taken before producing an item, freed when the item gets consumed
+      slots = Queue(self.depth)
+      stopped = Event()
+
+      def reserve():
+         waitStart = time.time()
+
+         # gives up once the consumer is gone, instead of blocking forever
+         while not stopped.is_set():
+            try:
+               slots.put(None, timeout=0.1)
+               self.producerStall += time.time() - waitStart
+               return True
+            except Full:
+               pass
+
+         return False
+
+      def produce():
+         try:
+            items = iter(self.iterable)
+
+            while reserve():
+               try:
+                  item = next(items)
+               except StopIteration:
+                  queue.put((False, None))
+                  return
+
+               queue.put((True, item))
+         except BaseException:
+            queue.put((False, sys.exc_info()))
+
+      producer = Thread(target=produce, name="prefetcher")
+      producer.daemon = True
+      producer.start()
+
+      try:
+         while True:
+            waitStart = time.time()
+            more, item = queue.get()
+            self.consumerStall += time.time() - waitStart
+
+            if not more:
+               break
+
+            slots.get_nowait()
+            yield item
+
+         if item is not None:
+            raise item[0], item[1], item[2]
+      finally:
+         stopped.set()
+         producer.join()
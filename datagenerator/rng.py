@@ -0,0 +1,245 @@
+import numpy
+
+"""
+   Counter-based random numbers. Instead of advancing a state, every random
+   number is a keyed hash of its coordinates::
+
+      (seed, stream, draw, row, element)
+
+   where ``stream`` identifies the item (feature or label) being generated,
+   ``draw`` counts the calls made for the same rows, ``row`` is the number of
+   the instance and ``element`` is the position of the number among the ones
+   of a row (eg. the bytes of a wide binary value). The seed, stream and draw
+   determine a key, and the numbers are the SplitMix64 sequence of that key
+   indexed by ``row * width + element``.
+
+   As a consequence, any range of instances can be generated independently
+   of the others, jumping ahead to any row costs nothing and the same data is
+   generated regardless of how instances are grouped in batches or split
+   among processes.
+
+   Samplers that need a varying number of draws per row (eg. rejection
+   sampling, see :meth:`CounterRandom.standard_gamma`) draw them from a
+   :meth:`CounterRandom.fork`, so that the draws that follow don't depend on
+   the rows the batch is made of.
+"""
+
+MASK = 0xffffffffffffffff
+GOLDEN = 0x9E3779B97F4A7C15
+
+SHIFT11 = numpy.uint64(11)
+SHIFT27 = numpy.uint64(27)
+SHIFT30 = numpy.uint64(30)
+SHIFT31 = numpy.uint64(31)
+MULTIPLIER1 = numpy.uint64(0xBF58476D1CE4E5B9)
+MULTIPLIER2 = numpy.uint64(0x94D049BB133111EB)
+
+def mix(x):
+   """The SplitMix64 finalizer, applied to an array of ``uint64``
+   """
+   x = (x ^ (x >> SHIFT30)) * MULTIPLIER1
+   x = (x ^ (x >> SHIFT27)) * MULTIPLIER2
+   return x ^ (x >> SHIFT31)
+
+def mixInt(x):
+   """The SplitMix64 finalizer, applied to a python integer
+   """
+   x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+   x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+   return x ^ (x >> 31)
+
+def streamKey(seed, stream, draw=0):
+   """Returns the key of a draw of the given stream of a seed
+   """
+   key = mixInt((seed + GOLDEN) & MASK)
+   key = mixInt((key ^ (stream * GOLDEN + GOLDEN)) & MASK)
+   return mixInt((key + draw * GOLDEN) & MASK)
+
+class CounterRandom():
+   """A source of random numbers for consecutive rows, starting at a given
+      one, of a stream of a seed. It implements the part of
+      :class:`numpy.random.RandomState` used by the samplers, where the first
+      dimension of the requested ``size`` is always the number of rows.
+   """
+
+   def __init__(self, seed, stream=0, start=0):
+      """
+      Args:
+         seed (int): a non-negative integer of up to 64 bits
+         stream (int): the stream (eg. the slot of an item)
+         start (int): the first row
+      """
+      self.seed = seed
+      self.stream = stream
+      self.start = start
+      self.draw = 0
+
+   def jump(self, start):
+      """Returns a source for the same stream starting at the given row. It
+         takes constant time regardless of how far the row is
+      """
+      return CounterRandom(self.seed, self.stream, start)
+
+   def fork(self):
+      """Returns an independent source for the same rows, keyed by the
+         current draw, and moves to the next draw. The draws of the fork
+         don't change the ones of this source
+      """
+      key = streamKey(self.seed, self.stream, self.draw)
+
+      self.draw += 1
+
+      return CounterRandom(key, self.stream, self.start)
+
+   def bits(self, size, rows=None):
+      """Returns 64 random bits for each element of an array of the given
+         shape. Every call moves to the next draw.
+
+      Args:
+         size (int or tuple): the shape of the array; its first dimension is
+                              the number of rows
+         rows (array): the rows (relative to the start) the numbers are drawn
+                       for, if not consecutive
+
+      """
+      shape = (size,) if numpy.isscalar(size) else tuple(size)
+      width = int(numpy.prod(shape[1:]))
+
+      if rows is None:
+         rows = numpy.arange(shape[0], dtype=numpy.uint64)
+
+      counters = (rows.astype(numpy.uint64) + numpy.uint64(self.start))
+
+      if width > 1:
+         counters = counters[:, None] * numpy.uint64(width) + \
+                    numpy.arange(width, dtype=numpy.uint64)[None, :]
+
+      key = numpy.uint64(streamKey(self.seed, self.stream, self.draw))
+
+      self.draw += 1
+
+      return mix(counters * numpy.uint64(GOLDEN) + key).reshape(shape)
+
+   def randomBytes(self, size):
+      """Random bytes, as an ``uint8`` array of the given (rows, width)
+         shape. Every 64 random bits give eight bytes, which makes it much
+         faster than ``randint(0, 256, size)`` for buffers of bytes (eg. of
+         characters)
+      """
+      rows, width = size
+      words = self.bits((rows, (width + 7) // 8)).astype('<u8', copy=False)
+      buffer = words.view(numpy.uint8)
+
+      if width % 8:
+         buffer = numpy.ascontiguousarray(buffer[:, :width])
+
+      return buffer
+
+   def random_sample(self, size, rows=None):
+      """Floats in the [0, 1) range (53 bits of precision)
+      """
+      return (self.bits(size, rows) >> SHIFT11) * (1.0 / 9007199254740992.0)
+
+   def standard_normal(self, size, rows=None):
+      """Normally distributed floats (mean 0, standard deviation 1), using
+         the Box-Muller transform
+      """
+      # 1 - u is in (0, 1], which has a logarithm
+      u = 1.0 - self.random_sample(size, rows)
+      angle = 2.0 * numpy.pi * self.random_sample(size, rows)
+      radius = numpy.sqrt(-2.0 * numpy.log(u))
+
+      return radius * numpy.cos(angle)
+
+   def standard_gamma(self, shape, size):
+      """Gamma distributed floats (scale 1), using the rejection method of
+         Marsaglia and Tsang, for a one-dimensional ``size``. Rejected rows
+         are drawn again, from a fork (see :meth:`fork`)
+
+      Args:
+         shape (float): the (positive) shape of the distribution
+
+      """
+      rounds = self.fork()
+
+      if shape < 1:
+         # gamma(shape) = gamma(shape + 1) * U^(1 / shape)
+         boost = self.random_sample(size) ** (1.0 / shape)
+         return rounds.standard_gamma(shape + 1, size) * boost
+
+      d = shape - 1.0 / 3
+      c = 1.0 / numpy.sqrt(9 * d)
+      values = numpy.empty(size)
+      rows = numpy.arange(size)
+
+      while len(rows):
+         x = rounds.standard_normal(len(rows), rows)
+         v = (1 + c * x) ** 3
+         u = rounds.random_sample(len(rows), rows)
+
+         with numpy.errstate(invalid='ignore', divide='ignore'):
+            accepted = (v > 0) & \
+               (numpy.log(u) < 0.5 * x * x + d - d * v + d * numpy.log(v))
+
+         values[rows[accepted]] = d * v[accepted]
+         rows = rows[~accepted]
+
+      return values
+
+   def randint(self, low, high, size, dtype=numpy.int64):
+      """Integers in the [low, high) range. Ranges that aren't a power of two
+         have a bias of at most (high - low) / 2^64
+      """
+      bits = self.bits(size)
+      span = high - low
+
+      if span == 1 << 64:
+         return bits.astype(dtype)
+
+      if span == 1:
+         values = numpy.zeros(bits.shape, numpy.uint64)
+      elif span & (span - 1) == 0:
+         values = bits >> numpy.uint64(64 - span.bit_length() + 1)
+      else:
+         values = bits % numpy.uint64(span)
+
+      if low == 0:
+         return values.astype(dtype)
+
+      return (values.astype(numpy.int64) + low).astype(dtype)
+
+class RowRandom():
+   """The random numbers of a stream for one row at a time, for samplers
+      that generate value by value (see :mod:`datagenerator.conditionals`).
+      The n-th call to :meth:`random` for a row returns the same number as
+      the n-th draw of :meth:`CounterRandom.random_sample` for that row,
+      without seeding anything.
+   """
+
+   def __init__(self, seed, stream=0):
+      self.seed = seed
+      self.stream = stream
+      # the keys of the draws, computed once
+      self.keys = []
+      self.row = 0
+      self.draw = 0
+
+   def reset(self, row):
+      """Moves to the first draw of the given (absolute) row
+      """
+      self.row = row
+      self.draw = 0
+
+   def random(self):
+      """A float in the [0, 1) range (53 bits of precision)
+      """
+      keys = self.keys
+
+      if self.draw == len(keys):
+         keys.append(streamKey(self.seed, self.stream, self.draw))
+
+      key = keys[self.draw]
+      self.draw += 1
+
+      return (mixInt((self.row * GOLDEN + key) & MASK) >> 11) * \
+             (1.0 / 9007199254740992.0)
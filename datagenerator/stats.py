@@ -0,0 +1,230 @@
+import json
+
+from collections import OrderedDict
+from time import time
+
+"""
+   Profiling counters of the generation. For every feature and label, and for
+   every stage of the generation::
+
+      sampling     -- generating features and labels that aren't conditional
+      conditionals -- generating labels with a 'conditional' distribution
+      formatting   -- converting batches to the output format
+      writing      -- writing the output (not counting the formatting)
+
+   the cumulative time, the number of calls and the number of values produced
+   are counted. When batches are generated in a thread of their own (see
+   :class:`datagenerator.pipeline.Prefetcher`), the time the generator and
+   the writer waited for each other is recorded as well. Like tracing (see
+   :mod:`datagenerator.tracing`), counters are hooked when the generation
+   gets compiled, around whole columns for most items, so they cost nothing
+   when disabled and little when enabled.
+"""
+
+class Stats():
+   stages = ["sampling", "conditionals", "formatting", "writing"]
+
+   def __init__(self):
+      # counters are [seconds, calls, values] lists, keyed by item name
+      # (along with the stage of the item) and by stage name
+      self.items = OrderedDict()
+      self.itemStages = {}
+      self.stageCounters = dict((stage, [0.0, 0, 0]) for stage in
+                                ["formatting", "writing"])
+      # seconds the generator and the writer of a pipeline stalled, if any
+      self.stalls = None
+
+   @staticmethod
+   def stageOf(item):
+      if item.distribution.name == "conditional":
+         return "conditionals"
+
+      return "sampling"
+
+   def itemCounter(self, item):
+      self.itemStages[item.name] = Stats.stageOf(item)
+      return self.items.setdefault(item.name, [0.0, 0, 0])
+
+   def wrapColumnSampler(self, item, sampler):
+      """
+         Returns a column sampler (see :class:`datagenerator.generation.
+         GenerationPlan`) that counts the calls to the given one
+      """
+      counter = self.itemCounter(item)
+
+      def countedSampler(batch, random):
+         start = time()
+         column = sampler(batch, random)
+         counter[0] += time() - start
+         counter[1] += 1
+         counter[2] += len(column)
+
+         return column
+
+      return countedSampler
+
+   def wrapValueSampler(self, item, sampler):
+      """
+         Returns a value sampler (see :class:`datagenerator.generation.
+         GenerationPlan`) that counts the calls to the given one
+      """
+      counter = self.itemCounter(item)
+
+      def countedSampler(instance, random):
+         start = time()
+         value = sampler(instance, random)
+         counter[0] += time() - start
+         counter[1] += 1
+
+         if value is not None:
+            counter[2] += 1
+
+         return value
+
+      return countedSampler
+
+   def wrapWriter(self, writer):
+      """
+         Counts the batches formatted and written by a writer. Writers that
+         format batches (with ``formatBatch``) write them with
+         ``writeFormatted``, which is counted instead of ``writeBatch`` so
+         that writing doesn't include formatting, wherever it happens (see
+         :meth:`datagenerator.generation.DataGenerator.generateSharded`)
+      """
+      if hasattr(writer, "formatBatch"):
+         writer.formatBatch = self.wrapBatchFunction(
+               "formatting", writer.formatBatch)
+         writer.writeFormatted = self.wrapBatchFunction(
+               "writing", writer.writeFormatted)
+      else:
+         writer.writeBatch = self.wrapBatchFunction(
+               "writing", writer.writeBatch)
+
+      return writer
+
+   def wrapBatchFunction(self, stage, function):
+      counter = self.stageCounters[stage]
+
+      def countedFunction(batch, *args):
+         start = time()
+         result = function(batch, *args)
+         counter[0] += time() - start
+         counter[1] += 1
+         counter[2] += len(batch)
+
+         return result
+
+      return countedFunction
+
+   def recordStalls(self, generator, writer):
+      """
+         Records the seconds the generator and the writer of a pipeline
+         waited for each other (see :class:`datagenerator.pipeline.
+         Prefetcher`)
+      """
+      self.stalls = (generator, writer)
+
+   def take(self):
+      """
+         Returns the counters and resets them (eg. to send them from a worker
+         process to be merged, see :meth:`merge`)
+      """
+      counters = ([(name, list(counter))
+                   for name, counter in self.items.items()],
+                  dict(self.itemStages),
+                  [(stage, list(counter))
+                   for stage, counter in self.stageCounters.items()])
+
+      # the lists are shared with the wrapped functions, reset in place
+      for counter in self.items.values() + self.stageCounters.values():
+         counter[:] = [0.0, 0, 0]
+
+      return counters
+
+   def merge(self, counters):
+      """Adds the counters taken from another :class:`Stats`
+      """
+      items, itemStages, stageCounters = counters
+
+      self.itemStages.update(itemStages)
+
+      for target, source in [(self.items, items),
+                             (self.stageCounters, stageCounters)]:
+         for name, counter in source:
+            total = target.setdefault(name, [0.0, 0, 0])
+
+            for n in range(3):
+               total[n] += counter[n]
+
+   def report(self):
+      """Returns the counters as a dictionary::
+
+            {"items": [{"name": "feature_0", "stage": "sampling",
+                        "seconds": 0.1, "calls": 25, "values": 100000},
+                       ...],
+             "stages": {"sampling": {"seconds": ..., "calls": ...,
+                                     "values": ...},
+                        ...},
+             "stalls": {"generator": 0.2, "writer": 0.0}}
+
+         The ``writing`` stage doesn't include the time spent formatting.
+         ``stalls`` are only there when the generation was pipelined (see
+         :meth:`recordStalls`)
+      """
+      stages = dict((stage, [0.0, 0, 0]) for stage in Stats.stages)
+      items = []
+
+      for name, counter in self.items.items():
+         stage = self.itemStages[name]
+         items.append(dict(Stats.counterReport(counter), name=name,
+                           stage=stage))
+
+         for n in range(3):
+            stages[stage][n] += counter[n]
+
+      stages["formatting"] = list(self.stageCounters["formatting"])
+      stages["writing"] = list(self.stageCounters["writing"])
+
+      report = {"items": items,
+                "stages": dict((stage, Stats.counterReport(counter))
+                               for stage, counter in stages.items())}
+
+      if self.stalls is not None:
+         report["stalls"] = {"generator": self.stalls[0],
+                             "writer": self.stalls[1]}
+
+      return report
+
+   @staticmethod
+   def counterReport(counter):
+      return {"seconds": counter[0], "calls": counter[1], "values": counter[2]}
+
+   def summary(self):
+      """Returns the counters as a human-readable table
+      """
+      report = self.report()
+      lines = ["%-24s %-14s %10s %10s %12s" %
+               ("item/stage", "stage", "seconds", "calls", "values")]
+
+      for item in report["items"]:
+         lines.append("%-24s %-14s %10.3f %10d %12d" % (
+               item["name"], item["stage"], item["seconds"], item["calls"],
+               item["values"]))
+
+      for stage in Stats.stages:
+         counter = report["stages"][stage]
+         lines.append("%-24s %-14s %10.3f %10d %12d" % (
+               "total", stage, counter["seconds"], counter["calls"],
+               counter["values"]))
+
+      for name, seconds in sorted(report.get("stalls", {}).items()):
+         lines.append("%-24s %-14s %10.3f" % ("stalled", name, seconds))
+
+      return "\n".join(lines) + "\n"
+
+   def save(self, fileName):
+      """Writes the report (see :meth:`report`) as JSON
+      """
+      outFile = open(fileName, 'w')
+      json.dump(self.report(), outFile, indent=1, sort_keys=True)
+      outFile.close()
@@ -0,0 +1,206 @@
+from datagenerator.generation import Configuration
+from datagenerator.generation import DataGenerator
+from datagenerator.generation import InstanceGenerator
+
+from itertools import product
+from multiprocessing import Pool
+
+"""
+   Parameter sweeps: generating the datasets of a grid of variations of a
+   configuration. Configurations are built in memory, every distinct dataset
+   is generated once even if several points of the grid describe it (eg.
+   when they only differ in how the data gets traced), and both generating
+   and processing the datasets are spread over a pool of processes.
+
+   All the points of a sweep share the same seed (unless a point sets its
+   own ``seed``), so datasets that only differ in their labels (eg. in the
+   parameters of a conditional) get the same features. These are generated
+   together: their features once, and only their labels for each of them
+   (see :meth:`datagenerator.generation.DataGenerator.generateVariants`).
+"""
+
+# options that don't change the generated data
+neutralOptions = ("trace", "stats", "batch_size", "pipeline_depth")
+
+def grid(parameters):
+   """Returns the points of a grid, every combination of the values of some
+      options, as dictionaries of overrides::
+
+         grid([("data_points", [10, 100]), ("output", ["csv", "arff"])])
+
+         [{"data_points": 10, "output": "csv"},
+          {"data_points": 10, "output": "arff"},
+          {"data_points": 100, "output": "csv"},
+          {"data_points": 100, "output": "arff"}]
+
+   Args:
+      parameters (list): ``(option, values)`` tuples (or a dictionary). The
+                         last option varies the fastest
+
+   """
+   if isinstance(parameters, dict):
+      parameters = sorted(parameters.items())
+
+   options = [option for option, values in parameters]
+
+   return [dict(zip(options, values))
+           for values in product(*[values for option, values in parameters])]
+
+class Sweep():
+   def __init__(self, base, points, seed=None):
+      """Creates a sweep of variations of a configuration
+
+      Args:
+         base (Configuration): the configuration all points derive from
+         points (list): the overrides of every point (eg. as returned by
+                        :func:`grid`)
+         seed (int): seed of the random numbers of the points that don't
+                     set their own ``seed``. If not given, the one of the
+                     base configuration is used or, if there's none, a new
+                     one is obtained from the OS
+
+      """
+      if seed is None:
+         seed = base.seed
+
+      if seed is None:
+         seed = InstanceGenerator.newSeed()
+
+      self.base = base
+      self.points = points
+      self.seed = seed
+
+      # the options of the distinct datasets, and the dataset of every point
+      self.datasets = []
+      self.pointDatasets = []
+
+      keys = {}
+
+      for point in points:
+         options = base.options()
+         options.update((option, str(value)) for option, value in point.items())
+
+         if "seed" not in point:
+            options["seed"] = str(seed)
+
+         # points with an output file of their own get their own dataset
+         key = Sweep.datasetKey(options, "output_file" in point)
+
+         if key not in keys:
+            keys[key] = len(self.datasets)
+
+            if "output_file" not in point:
+               options["output_file"] = DataGenerator.shardFileName(
+                     options["output_file"], len(self.datasets))
+
+            self.datasets.append(options)
+
+         self.pointDatasets.append(keys[key])
+
+   @staticmethod
+   def datasetKey(options, withFile=False):
+      """
+         Returns what identifies the dataset described by some options: the
+         options that change the generated data or the output (but not its
+         file, unless ``withFile``)
+      """
+      return tuple(sorted(
+            (option, value) for option, value in options.items()
+            if (withFile or option != "output_file") and
+               not option.startswith(neutralOptions)))
+
+   @staticmethod
+   def featureKey(options):
+      """
+         Returns what identifies the features of the dataset described by
+         some options: all the options but the ones of labels and output
+      """
+      return tuple(sorted(
+            (option, value) for option, value in options.items()
+            if not option.startswith(("label", "output") + neutralOptions)))
+
+   def groups(self):
+      """Returns the options of the distinct datasets, grouped by features
+      """
+      groups = {}
+
+      for options in self.datasets:
+         groups.setdefault(Sweep.featureKey(options), []).append(options)
+
+      return sorted(groups.values(),
+                    key=lambda group: self.datasets.index(group[0]))
+
+   def configuration(self, n):
+      """Returns the configuration of the n-th point
+      """
+      return Configuration.fromOptions(self.datasets[self.pointDatasets[n]])
+
+   def fileName(self, n):
+      """Returns the output file of the n-th point
+      """
+      return self.datasets[self.pointDatasets[n]]["output_file"]
+
+   def generate(self, workers=None):
+      """Generates every distinct dataset of the sweep, in a pool of
+         processes
+
+      Args:
+         workers (int): number of processes. One per CPU by default
+
+      Returns:
+         the output file of every point
+
+      """
+      pool = Pool(workers)
+
+      try:
+         pool.map(generateDatasets, self.groups())
+      finally:
+         pool.close()
+         pool.join()
+
+      return [self.fileName(n) for n in range(len(self.points))]
+
+   def map(self, function, workers=None):
+      """Generates the datasets of the sweep (see :meth:`generate`) and then
+         calls a function for every point, in a pool of processes
+
+      Args:
+         function: a function (that can be pickled, eg. defined at the top
+                   level of a module) that gets the overrides of a point and
+                   its output file
+         workers (int): number of processes. One per CPU by default
+
+      Returns:
+         what the function returned for every point
+
+      """
+      fileNames = self.generate(workers)
+      pool = Pool(workers)
+
+      try:
+         return pool.map(callPoint, [(function, point, fileName) for
+                                     point, fileName in zip(self.points,
+                                                            fileNames)])
+      finally:
+         pool.close()
+         pool.join()
+
+def generateDatasets(datasets):
+   # the datasets of a group share their features, and so their seed
+   seed = int(datasets[0]["seed"])
+   configs = map(Configuration.fromOptions, datasets)
+
+   try:
+      if len(configs) == 1:
+         DataGenerator.generate(configs[0].parser, seed=seed)
+      else:
+         DataGenerator.generateVariants(configs, seed)
+   finally:
+      for c in configs:
+         c.close()
+
+def callPoint(call):
+   function, point, fileName = call
+
+   return function(point, fileName)
@@ -0,0 +1,57 @@
+from datagenerator import benchmark
+from datagenerator import conditionals
+from datagenerator.test.cases import ExtendedTestCase
+
+class BenchmarkTest(ExtendedTestCase):
+
+   def test_conditionals(self):
+      # every conditional gets benchmarked
+      self.assertEqual(
+            sorted(benchmark.conditionalArguments),
+            sorted(name for name in dir(conditionals)
+                   if name.endswith("Conditional")))
+
+   def test_run(self):
+      cases = [case for case in benchmark.cases([100], [2])
+               if "int32 uniform" in case["name"] or
+                  "rangeConditional/" in case["name"] or
+                  case["name"].startswith("writer/csv") or
+                  "binary(1024) gamma" in case["name"] or
+                  "d) weighted" in case["name"]]
+
+      self.assertEqual([case["name"] for case in cases], [
+            "sampler/int32 uniform/rows=100/width=2",
+            "sampler/binary(1024) gamma/rows=100/width=2",
+            "sampler/value_list(a, b, c, d) weighted/rows=100/width=2",
+            "conditional/rangeConditional/rows=100/width=2",
+            "writer/csv/rows=100/width=2"])
+
+      results = benchmark.run(cases)["results"]
+
+      self.assertEqual([r["name"] for r in results],
+                       [case["name"] for case in cases])
+      self.assertEqual(results[1]["error"],
+                       "data type binary not supported by the gamma "
+                       "distribution")
+
+      for result in results[:1] + results[2:]:
+         self.assertTrue(result["rowsPerSecond"] > 0)
+         self.assertTrue(result["bytesPerSecond"] > 0)
+         self.assertTrue(result["peakMemory"] > 0)
+
+   def test_compare(self):
+      baseline = {"results": [
+            {"name": "a", "rowsPerSecond": 100.0},
+            {"name": "b", "rowsPerSecond": 100.0},
+            {"name": "c", "error": "unsupported"}]}
+      results = {"results": [
+            {"name": "a", "rowsPerSecond": 95.0},
+            {"name": "b", "rowsPerSecond": 50.0},
+            {"name": "c", "rowsPerSecond": 10.0},
+            {"name": "d", "rowsPerSecond": 10.0}]}
+
+      comparison = benchmark.compare(results, baseline, 0.1)
+
+      self.assertEqual([c["name"] for c in comparison], ["a", "b"])
+      self.assertEqual([c["regression"] for c in comparison], [False, True])
+      self.assertAlmostEqual(comparison[1]["change"], -0.5)
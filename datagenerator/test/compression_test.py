@@ -0,0 +1,69 @@
+from datagenerator.compression import CompressedFile
+from datagenerator.compression import compressionMethod
+from datagenerator.compression import openOutput
+from datagenerator.writers import WriterFactory
+from datagenerator.test.cases import ExtendedTestCase
+
+from os import remove
+
+import gzip
+
+class CompressionTest(ExtendedTestCase):
+
+   def test_method(self):
+      self.assertEqual(compressionMethod("out.csv"), "none")
+      self.assertEqual(compressionMethod("out.csv.gz"), "gzip")
+      self.assertEqual(compressionMethod("out.csv.zst"), "zstd")
+      self.assertEqual(compressionMethod("out.csv.gz", "none"), "none")
+      self.assertEqual(compressionMethod("out.csv", "xz"), "xz")
+
+      self.assertRaisesWithMessage(
+            "unknown compression method rar", compressionMethod, "out", "rar")
+
+   def test_gzip(self):
+      lines = ["line " + str(n) + "\n" for n in range(10000)]
+
+      # small blocks, so that the file is made of many gzip members
+      f = CompressedFile("test.csv.gz", "gzip", threads=3, blockSize=1000)
+
+      for line in lines:
+         f.write(line)
+
+      f.close()
+
+      self.assertEqual(gzip.open("test.csv.gz").read(), ''.join(lines))
+      self.assertTrue(open("test.csv.gz", 'rb').read().count('\x1f\x8b') > 1)
+
+      remove("test.csv.gz")
+
+      # nothing written
+      f = openOutput("test.csv.gz")
+      f.close()
+
+      self.assertEqual(gzip.open("test.csv.gz").read(), '')
+
+      remove("test.csv.gz")
+
+   def test_writer(self):
+      self.assertRaisesWithMessage(
+            "unknown compression method lzo",
+            WriterFactory.create,
+            output="csv", output_file="test.csv", output_compression="lzo")
+
+      self.assertRaisesWithMessage(
+            "invalid value for 'output_compression_level': high",
+            WriterFactory.create,
+            output="csv", output_file="test.csv", output_compression="gzip",
+            output_compression_level="high")
+
+      w = WriterFactory.create(
+            output="csv", output_file="test.csv", output_compression="gzip",
+            output_compression_level="1")
+
+      w.open()
+      w.outFile.write("a,b\n")
+      w.close()
+
+      self.assertEqual(gzip.open("test.csv").read(), "a,b\n")
+
+      remove("test.csv")
@@ -1,10 +1,20 @@
+from datagenerator import conditionals
+from datagenerator.core import Batch
+from datagenerator.core import DataType
+from datagenerator.core import Distribution
+from datagenerator.core import Feature
+from datagenerator.core import Label
+from datagenerator.core import Schema
 from datagenerator.generation import Configuration
 from datagenerator.generation import InstanceGenerator
+from datagenerator.test.cases import ExtendedTestCase
 
 from math import floor
 from os import remove
 from unittest import TestCase
 
+import numpy
+
 class rangeConditionalTest(TestCase):
 
    def test_basic(self):
@@ -89,3 +99,65 @@ output_file = output.csv
             self.assertEqual(label, 1)
 
       remove('conf/temp.conf')
+
+class rangeConditionalColumnTest(ExtendedTestCase):
+
+   def setUp(self):
+      self.f1 = Feature("feature_1", DataType("int32"), Distribution("uniform"))
+      self.l1 = Label("label_1", DataType("binary(1)"), Distribution("uniform"))
+      self.batch = Batch(0, 1000, Schema([self.f1], [self.l1]))
+      self.random = numpy.random.RandomState(3)
+      self.batch.columns[0] = self.random.randint(
+            -2147483648, 2147483648, 1000, dtype=numpy.int32)
+
+   def test_basic(self):
+      args = { "instanceMembers": [1], "bucketSize": 536870912,
+               "values": [0,1,1,1,1,1] }
+
+      column = conditionals.rangeConditionalColumn(
+            args, self.l1.dataType, self.batch.schema)(self.batch, self.random)
+
+      self.assertEqual(column.dtype, self.l1.dataType.dtype)
+
+      # same as the row-by-row version
+      for row, instance in enumerate(self.batch.instances()):
+         self.assertEqual(
+               column[row],
+               conditionals.rangeConditional(
+                     args, self.l1.dataType, instance, None))
+
+   def test_bernoulli(self):
+      args = { "instanceMembers": [1], "bucketSize": 2147483648,
+               "values": [0.0, 1.0] }
+
+      column = conditionals \
+         .rangeForBinaryWithBernoulliParameterConditionalColumn(
+               args, self.l1.dataType, self.batch.schema)(
+                     self.batch, self.random)
+
+      feature = self.batch.columns[0]
+
+      self.assertTrue((column[feature < 0] == 0).all())
+      self.assertTrue((column[feature >= 0] == 1).all())
+
+   def test_validation(self):
+      self.assertRaisesWithMessage(
+            "missing 'bucketSize' in rangeConditional args",
+            conditionals.rangeConditionalColumn,
+            { "instanceMembers": [1], "values": [0, 1] },
+            self.l1.dataType, self.batch.schema)
+
+      self.assertRaisesWithMessage(
+            "item index must be in the [1, instance.size] range: 2",
+            conditionals.rangeConditionalColumn,
+            { "instanceMembers": [3], "bucketSize": 4, "values": [0, 1] },
+            self.l1.dataType, self.batch.schema)
+
+      self.assertRaisesWithMessage(
+            "'instanceMembers' should refer to an integer item",
+            conditionals.rangeConditionalColumn,
+            { "instanceMembers": [3], "bucketSize": 4, "values": [0, 1] },
+            self.l1.dataType,
+            Schema([self.f1], [self.l1, Label(
+                  "label_2", DataType("conditional"),
+                  Distribution("uniform"))]))
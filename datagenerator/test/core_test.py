@@ -1,8 +1,10 @@
+from datagenerator.core import Batch
 from datagenerator.core import DataType
 from datagenerator.core import Distribution
 from datagenerator.core import Feature
 from datagenerator.core import Instance
 from datagenerator.core import Label
+from datagenerator.core import Schema
 from datagenerator.test.cases import ExtendedTestCase
 import unittest
 
@@ -27,6 +29,93 @@ class InstanceTest(ExtendedTestCase):
       self.assertRaisesWithMessage(
             "item " + str(l1) + " not assigned", i.value, l1)
 
+   def test_reset(self):
+      f1 = Feature("feature_1",DataType("int32"), Distribution("uniform"))
+      l1 = Label("label_1",DataType("binary(1)"), Distribution("uniform"))
+
+      i = Instance(1, [f1], [l1])
+
+      i.assign(f1, 3)
+      i.assign(l1, "1")
+
+      self.assertRaisesWithMessage(
+            "item " + str(f1) + " already assigned with 3", i.assign, f1, 4)
+
+      i.reset(2)
+
+      self.assertEqual(i.number, 2)
+      self.assertRaisesWithMessage(
+            "item " + str(f1) + " not assigned", i.value, f1)
+
+      i.assign(f1, 4)
+
+      self.assertEqual(i.value(f1), 4)
+
+class SchemaTest(ExtendedTestCase):
+
+   def test_basic(self):
+      f1 = Feature("feature_1",DataType("int32"), Distribution("uniform"))
+      f2 = Feature("feature_2",DataType("int32"), Distribution("uniform"))
+      l1 = Label("label_1",DataType("binary(1)"), Distribution("uniform"))
+      l2 = Label("label_2",DataType("int32"), Distribution("uniform"))
+
+      s = Schema([f1, f2], [l1])
+
+      self.assertEqual(s.size(), 3)
+      self.assertEqual(s.slot(f1), 0)
+      self.assertEqual(s.slot(f2), 1)
+      self.assertEqual(s.slot(l1), 2)
+
+      # equal copies are found too
+      self.assertEqual(
+            s.slot(Label("label_1",DataType("binary(1)"),
+                   Distribution("uniform"))), 2)
+
+      self.assertRaisesWithMessage(
+            "item " + str(l2) + " not in list of items", s.slot, l2)
+
+      # instances share the schema
+      i = Instance(0, None, None, s)
+
+      self.assertEqual(i.features, [f1, f2])
+      self.assertEqual(i.labels, [l1])
+      self.assertEqual(i.size(), 3)
+
+class BatchTest(ExtendedTestCase):
+
+   def test_basic(self):
+      f1 = Feature("feature_1",DataType("int32"), Distribution("uniform"))
+      f2 = Feature("feature_2",DataType("binary(70)"), Distribution("uniform"))
+      f3 = Feature(
+            "feature_3", DataType("value_list(a, b, c)"),
+            Distribution("uniform"))
+      l1 = Label("label_1",DataType("binary(1)"), Distribution("uniform"))
+
+      b = Batch(10, 2, Schema([f1, f2, f3], [l1]))
+
+      self.assertEqual(len(b), 2)
+      self.assertEqual(b.column(f1).dtype.name, "int32")
+      self.assertEqual(b.column(f2).shape, (2, 9))
+      self.assertEqual(b.column(f3).dtype.name, "int32")
+      self.assertEqual(b.column(l1).dtype.name, "uint8")
+
+      b.column(f1)[1] = -4
+      b.column(f2)[1] = f2.dataType.encode("1" + "0" * 69)
+      b.column(f3)[1] = f3.dataType.encode("c")
+      b.column(l1)[1] = 1
+
+      i = b.instance(1)
+
+      self.assertEqual(i.number, 11)
+      self.assertEqual(i.value(f1), -4)
+      self.assertEqual(i.value(f2), 2 ** 69)
+      self.assertEqual(i.value(f3), "c")
+      self.assertEqual(i.value(l1), 1)
+
+      numbers = [instance.number for instance in b.instances()]
+
+      self.assertEqual(numbers, [10, 11])
+
 class FeatureTest(unittest.TestCase):
    """For Label, the test is exactly the same
    """
@@ -81,6 +170,26 @@ class DataTypeTest(unittest.TestCase):
       self.assertEqual(feature.size, 13) # size is with respect to longest
       self.assertEqual(len(feature.values), 4)
 
+      feature = DataType("string(8)")
+      self.assertEqual(feature.alphabet, DataType.defaultAlphabet)
+      feature.setAlphabet("01")
+      self.assertEqual(feature.alphabet, "01")
+      self.assertFalse(feature == DataType("string(8)"))
+
+      self.assertRaises(Exception, feature.setAlphabet, "")
+      self.assertRaises(Exception, feature.setAlphabet, "caf\xc3\xa9")
+      self.assertRaises(Exception, DataType("int32").setAlphabet, "01")
+
+      feature = DataType("float32")
+      self.assertEqual(feature.name, "float32")
+      self.assertEqual(feature.size, 1)
+      self.assertEqual(feature.dtype.name, "float32")
+      self.assertEqual(feature.decode(feature.allocate(1)[0]), 0.0)
+
+      feature = DataType("float64")
+      self.assertEqual(feature.name, "float64")
+      self.assertEqual(feature.dtype.name, "float64")
+
       # TODO value_list file
       # feature = DataType("value_list(file.txt)")
 
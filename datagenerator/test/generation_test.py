@@ -1,10 +1,22 @@
+from datagenerator.core import Batch
 from datagenerator.core import DataType
 from datagenerator.core import Distribution
+from datagenerator.core import Instance
+from datagenerator.core import Schema
 from datagenerator.generation import Configuration
+from datagenerator.generation import DataGenerator
+from datagenerator.generation import GenerationPlan
 from datagenerator.generation import InstanceGenerator
 from datagenerator.generation import ValueGenerator
+from datagenerator.rng import CounterRandom
 from datagenerator.test.cases import ExtendedTestCase
+from datagenerator import conditionals
 
+from functools import partial
+from threading import Thread
+
+import numpy
+import random
 import unittest
 import os
 
@@ -198,6 +210,90 @@ class ConfigurationTest(ExtendedTestCase):
       #  * gamma, beta, log-normal
       #  * parameters for each of the above
 
+   def test_options(self):
+      conf = Configuration('conf/sample.conf')
+      options = conf.options()
+
+      self.assertEqual(options["data_points"], "100")
+
+      # in memory, without any file
+      conf = Configuration.fromOptions(dict(options, data_points=5))
+
+      self.assertEqual(conf.dataPoints, 5)
+      self.assertEqual(len(conf.features), 1)
+
+      derived = conf.derive(data_points=7, batch_size=2)
+
+      self.assertEqual(derived.dataPoints, 7)
+      self.assertEqual(derived.batchSize, 2)
+      self.assertEqual(conf.dataPoints, 5)
+
+      # strings of a given alphabet
+      conf = conf.derive(feature_1_type="string(6)", feature_1_alphabet="AC")
+      column = DataGenerator.arrays(conf, 1)["feature1"]
+
+      self.assertEqual(set("".join(column)), set("AC"))
+
+      self.assertRaisesWithMessage(
+            "only 'string' data types have an alphabet",
+            Configuration.fromOptions, dict(options, feature_1_alphabet="AC"))
+
+      # values read from a file
+      valuesFile = open('values.txt', 'w')
+      valuesFile.write('\n'.join(str(n) + ' Main St' for n in range(1000)))
+      valuesFile.close()
+
+      conf = Configuration.fromOptions(dict(
+            options, feature_1_type="value_list",
+            feature_1_values_file="'values.txt'"))
+      column = DataGenerator.arrays(conf, 1)["feature1"]
+
+      self.assertEqual(conf.features[0].dataType.size, 11)
+      self.assertTrue(0 <= column.min() and column.max() < 1000)
+
+      # derived configurations map the file again, but don't index it again
+      derived = conf.derive(data_points=10)
+      self.assertTrue(derived.features[0].dataType.values.table is
+                      conf.features[0].dataType.values.table)
+
+      conf.close()
+      self.assertEqual(derived.features[0].dataType.values[999],
+                       "999 Main St")
+      derived.close()
+
+      self.assertRaisesWithMessage(
+            "only 'value_list' data types take a values file",
+            Configuration.fromOptions,
+            dict(options, feature_1_values_file="values.txt"))
+
+      # weights of the values
+      conf = Configuration.fromOptions(dict(
+            options, feature_1_type="value_list(a, b, c)",
+            feature_1_distribution="weighted", feature_1_weights="0, 1, 0"))
+      column = DataGenerator.arrays(conf, 1)["feature1"]
+
+      self.assertEqual(set(column), set([1]))
+
+      weightsFile = open('weights.txt', 'w')
+      weightsFile.write('1\n0\n0\n')
+      weightsFile.close()
+
+      conf = Configuration.fromOptions(dict(
+            options, feature_1_type="value_list(a, b, c)",
+            feature_1_distribution="weighted",
+            feature_1_weights_file="weights.txt"))
+      column = DataGenerator.arrays(conf, 1)["feature1"]
+
+      self.assertEqual(set(column), set([0]))
+
+      self.assertRaisesWithMessage(
+            "expecting either weights or a weights file for feature: 1",
+            Configuration.fromOptions,
+            dict(options, feature_1_distribution="weighted"))
+
+      os.remove('values.txt')
+      os.remove('weights.txt')
+
    def test_output(self):
 
       self.messedConfFile = 'conf/messed.conf'
@@ -301,7 +397,7 @@ class ConfigurationTest(ExtendedTestCase):
       Configuration(self.messedConfFile)
       os.remove(self.messedConfFile)
 
-class InstanceGeneratorTest(unittest.TestCase):
+class InstanceGeneratorTest(ExtendedTestCase):
 
    def test_basic(self):
       conf = Configuration('conf/sample.conf')
@@ -317,6 +413,274 @@ class InstanceGeneratorTest(unittest.TestCase):
       self.assertEqual(i.number, 1)
       self.assertEqual(i, ig.current)
 
+   def test_batch(self):
+      conf = Configuration('conf/sample.conf')
+      ig = InstanceGenerator(conf)
+
+      b = ig.generateBatch(5)
+
+      self.assertEqual(b.start, 0)
+      self.assertEqual(len(b), 5)
+      self.assertEqual(len(b.columns), 2)
+      self.assertEqual(b.column(conf.features[0]).dtype.name, "int32")
+      self.assertEqual(len(b.column(conf.labels[0])), 5)
+
+      # per-row generation continues where the batch ended
+      self.assertEqual(ig.generateNext().number, 5)
+
+   def test_seed(self):
+      conf = Configuration('conf/sample.conf', seed=123, batch_size=7)
+
+      self.assertEqual(conf.seed, 123)
+
+      feature = conf.features[0]
+      whole = InstanceGenerator(conf).generateBatch(20).column(feature)
+
+      # instances don't depend on the batch they're generated in
+      ig = InstanceGenerator(conf)
+      parts = [ig.generateBatch(n).column(feature) for n in [3, 10, 7]]
+
+      self.assertTrue((numpy.concatenate(parts) == whole).all())
+
+      ig = InstanceGenerator(conf)
+      ig.counter = 12
+
+      self.assertTrue((ig.generateBatch(8).column(feature) == whole[12:]).all())
+
+      for n in range(20):
+         self.assertEqual(ig.newBatch(n, 1).column(feature)[0], whole[n])
+
+      # the seed of the configuration can be overridden
+      other = InstanceGenerator(conf, 124).generateBatch(20).column(feature)
+
+      self.assertFalse((other == whole).all())
+
+      self.assertRaisesWithMessage(
+            "'seed' should be a non-negative 64-bit integer",
+            Configuration, 'conf/sample.conf', seed=-1)
+
+      sizes = [len(b) for b in ig.generateBatches(2 * conf.batchSize + 1)]
+
+      self.assertEqual(sizes, [conf.batchSize, conf.batchSize, 1])
+
+class DataGeneratorTest(ExtendedTestCase):
+
+   def setUp(self):
+      confFile = open('conf/temp.conf', 'w')
+      confFile.write("""
+[global]
+
+data_points = 250
+batch_size = 32
+
+features = 2
+feature_1_type = int32
+feature_1_distribution = uniform
+feature_2_type = value_list(a, b, c)
+feature_2_distribution = uniform
+
+labels = 1
+label_1_type = binary(1)
+label_1_distribution = conditional
+label_1_parameter1 = rangeConditional
+label_1_parameter2 = '{ "instanceMembers": [1], "bucketSize": 2147483648, "values": [0,1] }'
+
+output = csv
+output_file = test.csv
+      """)
+      confFile.close()
+
+   def tearDown(self):
+      os.remove('conf/temp.conf')
+
+   def test_shards(self):
+      self.assertEqual(DataGenerator.shards(250, 32, 3),
+                       [(0, 64), (64, 96), (160, 90)])
+      self.assertEqual(DataGenerator.shards(10, 32, 3), [(0, 10)])
+      self.assertEqual(DataGenerator.shardFileName("out.csv", 2), "out.2.csv")
+
+   def test_workers(self):
+      DataGenerator.generate('conf/temp.conf', seed=11)
+      expected = open('test.csv').readlines()
+
+      self.assertEqual(len(expected), 251)
+
+      DataGenerator.generate('conf/temp.conf', workers=3, seed=11)
+
+      self.assertEqual(open('test.csv').readlines(), expected)
+
+      DataGenerator.generate(
+            'conf/temp.conf', workers=3, shardFiles=True, seed=11)
+
+      lines = []
+
+      for n in range(3):
+         shard = open('test.' + str(n) + '.csv').readlines()
+         self.assertEqual(shard[0], expected[0])
+         lines.extend(shard[1:])
+         os.remove('test.' + str(n) + '.csv')
+
+      self.assertEqual(lines, expected[1:])
+
+      os.remove('test.csv')
+
+      # errors in the configuration are raised before workers start
+      for shardFiles in [False, True]:
+         self.assertRaisesWithMessage(
+               "expected 3 weights, got 2",
+               DataGenerator.generate, 'conf/temp.conf', workers=2,
+               shardFiles=shardFiles, seed=11,
+               feature_2_distribution="weighted", feature_2_weights="1, 2")
+
+   def test_pipeline(self):
+      DataGenerator.generate('conf/temp.conf', seed=11)
+      expected = open('test.csv').readlines()
+
+      DataGenerator.generate(
+            'conf/temp.conf', seed=11, pipeline_depth=2, trace="info",
+            trace_file="trace.txt")
+
+      self.assertEqual(open('test.csv').readlines(), expected)
+      self.assertTrue(open('trace.txt').readlines()[-1].startswith(
+            "[info] generator stalled "))
+
+      os.remove('trace.txt')
+      os.remove('test.csv')
+
+      self.assertRaisesWithMessage(
+            "'pipeline_depth' should be a non-negative integer",
+            Configuration, 'conf/temp.conf', pipeline_depth=-1)
+
+   def test_arrays(self):
+      DataGenerator.generate('conf/temp.conf', seed=11)
+      expected = open('test.csv').readlines()[1:]
+      os.remove('test.csv')
+
+      arrays = DataGenerator.arrays(Configuration('conf/temp.conf'), 11)
+
+      self.assertEqual(arrays.keys(), ["feature1", "feature2", "label1"])
+      self.assertEqual(len(arrays["feature1"]), 250)
+
+      # the same data, without going through a file
+      self.assertEqual(expected, [
+            str(f1) + "," + "abc"[f2] + "," + str(l1) + "\n" for f1, f2, l1 in
+            zip(arrays["feature1"], arrays["feature2"], arrays["label1"])])
+
+      # streamed in batches
+      batches = list(DataGenerator.stream(
+            Configuration('conf/temp.conf'), 100, seed=11))
+
+      self.assertEqual([len(b) for b in batches], [100, 100, 50])
+      self.assertTrue(all(
+            (numpy.concatenate([b.columns[n] for b in batches]) == column)
+            .all() for n, column in enumerate(arrays.values())))
+
+      try:
+         import pandas
+      except ImportError:
+         self.assertRaisesWithMessage(
+               "generating a DataFrame requires pandas",
+               DataGenerator.dataFrame, Configuration('conf/temp.conf'), 11)
+         return
+
+      frame = DataGenerator.dataFrame(Configuration('conf/temp.conf'), 11)
+
+      self.assertEqual(list(frame.columns), arrays.keys())
+      self.assertEqual(list(frame["feature2"][:3]),
+                       ["abc"[n] for n in arrays["feature2"][:3]])
+
+class GenerationPlanTest(ExtendedTestCase):
+
+   def test_stages(self):
+      conf = Configuration('conf/sample.conf')
+
+      # dummyConditional has no column-level version
+      plan = GenerationPlan(conf)
+
+      self.assertEqual(len(plan.stages), 2)
+      self.assertEqual(plan.stages[0][0], True)
+      self.assertEqual([n for n, _ in plan.stages[0][1]], [0])
+      self.assertEqual(plan.stages[1][0], False)
+      self.assertEqual([n for n, _ in plan.stages[1][1]], [1])
+
+      # the global random module is left alone
+      random.seed(5)
+      expected = random.random()
+      random.seed(5)
+
+      batch = plan.run(3, 10, 17)
+
+      self.assertEqual(random.random(), expected)
+      self.assertEqual(batch.start, 3)
+      self.assertEqual(len(batch), 10)
+
+      # value samplers draw from the stream of their item and row
+      plan.stages[1:] = [(False, [(1, partial(
+            conditionals.rangeForBinaryWithBernoulliParameterConditional,
+            {"instanceMembers": [1], "bucketSize": 2147483648,
+             "values": [0.5, 0.5]}, conf.labels[0].dataType))])]
+
+      column = plan.run(0, 1000, 17).columns[1]
+
+      self.assertEqual(list(plan.run(600, 20, 17).columns[1]),
+                       list(column[600:620]))
+      self.assertEqual(list(column), list(
+            CounterRandom(17, 1).random_sample(1000) < 0.5))
+
+      # plans generating at the same time don't share any random state
+      plans = [GenerationPlan(conf), GenerationPlan(conf)]
+
+      for other in plans:
+         other.stages[1:] = plan.stages[1:]
+
+      columns = [[], []]
+
+      def generate(n):
+         for start in range(0, 1000, 10):
+            columns[n].extend(plans[n].run(start, 10, 17 + n).columns[1])
+
+      threads = [Thread(target=generate, args=(n,)) for n in range(2)]
+
+      for thread in threads:
+         thread.start()
+
+      for thread in threads:
+         thread.join()
+
+      self.assertEqual(columns[0], list(column))
+      self.assertEqual(columns[1], list(plan.run(0, 1000, 18).columns[1]))
+
+   def test_compile(self):
+      conf = Configuration('conf/sample.conf')
+      conf.labels[0].distribution.parameters[0] = "rangeConditional"
+      conf.labels[0].distribution.parameters[1] = \
+         """'{"instanceMembers": [1], "bucketSize": 2, "values": [0, 1]}'"""
+
+      plan = GenerationPlan(conf)
+
+      self.assertEqual(len(plan.stages), 1)
+
+      conf.labels[0].distribution.parameters[1] = \
+         """'{"instanceMembers": [1], "values": [0, 1]}'"""
+
+      # validated when the plan gets compiled
+      self.assertRaisesWithMessage(
+            "missing 'bucketSize' in rangeConditional args",
+            GenerationPlan, conf)
+
+      conf.labels[0].distribution = Distribution("gamma")
+
+      self.assertRaisesWithMessage(
+            "the gamma distribution expects two numeric parameters",
+            GenerationPlan, conf)
+
+      conf.labels[0].distribution.addParameter(0, "2")
+      conf.labels[0].distribution.addParameter(1, "0")
+
+      self.assertRaisesWithMessage(
+            "invalid parameters for the gamma distribution: 2.0, 0.0",
+            GenerationPlan, conf)
+
 class ValueGeneratorTest(ExtendedTestCase):
    def test_functionSearch(self):
       d = Distribution("uniform")
@@ -328,6 +692,12 @@ class ValueGeneratorTest(ExtendedTestCase):
       self.assertEqual(
             ValueGenerator.getFunction(d).__class__.__name__, "partial")
 
+      d = Distribution("conditional")
+      d.addParameter(0, "doesNotExist")
+      d.addParameter(1, "{}")
+      self.assertRaisesWithMessage(
+            "unknown conditional doesNotExist", ValueGenerator.getFunction, d)
+
    def test_uniformGenerator(self):
       dt = DataType("binary(2)")
 
@@ -353,9 +723,218 @@ class ValueGeneratorTest(ExtendedTestCase):
       int(value) # this will throw an exception if value is not a proper integer
 
 
+   def test_uniformColumnGenerator(self):
+      random = numpy.random.RandomState(7)
+      schema = Schema([], [])
+      batch = Batch(0, 1000, schema)
+
+      c = ValueGenerator.generateUniformColumn(
+            DataType("int32"), batch, random)
+      self.assertEqual(c.dtype.name, "int32")
+      self.assertEqual(len(c), 1000)
+      self.assertTrue(c.min() < 0 and c.max() > 0)
+
+      c = ValueGenerator.generateUniformColumn(
+            DataType("int(4)"), batch, random)
+      self.assertEqual(sorted(set(c)), [0, 1, 2, 3, 4])
+
+      c = ValueGenerator.generateUniformColumn(
+            DataType("binary(3)"), batch, random)
+      self.assertEqual(c.dtype.name, "uint8")
+      self.assertEqual(sorted(set(c)), range(8))
+
+      dt = DataType("binary(70)")
+      c = ValueGenerator.generateUniformColumn(dt, batch, random)
+      self.assertEqual(c.shape, (1000, 9))
+      self.assertTrue(max(dt.decode(v) for v in c) < 2 ** 70)
+      self.assertTrue(max(dt.decode(v) for v in c) >= 2 ** 69)
+
+      dt = DataType("value_list(a, b, c)")
+      c = ValueGenerator.generateUniformColumn(dt, batch, random)
+      self.assertEqual(sorted(set(c)), [0, 1, 2])
+
+      for spec in ["float32", "float64"]:
+         c = ValueGenerator.generateUniformColumn(DataType(spec), batch, random)
+         self.assertEqual(c.dtype.name, spec)
+         self.assertTrue(c.min() >= 0 and c.max() < 1)
+         self.assertAlmostEqual(c.mean(), 0.5, places=1)
+
+      dt = DataType("string(6)")
+      c = ValueGenerator.generateUniformColumn(dt, batch, random)
+      self.assertEqual(c.shape, (1000,))
+      self.assertTrue(all(len(dt.decode(v)) == 6 for v in c))
+      self.assertEqual(set("".join(map(dt.decode, c))),
+                       set(dt.alphabet))
+
+      self.assertRaisesWithMessage(
+            "data type conditional not supported yet",
+            ValueGenerator.generateUniformColumn,
+            DataType("conditional"), batch, random)
+
+   def test_continuousColumnGenerator(self):
+      batch = Batch(0, 20000, Schema([], []))
+
+      def sampler(dataType, name, first, second):
+         distribution = Distribution(name)
+         distribution.addParameter(0, first)
+         distribution.addParameter(1, second)
+
+         return ValueGenerator.continuousSampler(
+               DataType(dataType), distribution)
+
+      # gamma(2, 3) has mean 6, truncating drops 0.5 on average
+      c = sampler("int(1000)", "gamma", "2", "3")(batch, CounterRandom(1))
+      self.assertEqual(c.dtype.name, "int32")
+      self.assertAlmostEqual(c.mean(), 5.5, places=0)
+      self.assertTrue(c.min() >= 0)
+
+      # beta(2, 5) has mean 2/7, scaled onto the whole range
+      c = sampler("int(99)", "beta", "2", "5")(batch, CounterRandom(1))
+      self.assertAlmostEqual(c.mean() / 100, 2.0 / 7, places=2)
+      self.assertTrue(c.min() >= 0 and c.max() < 100)
+
+      c = sampler("int32", "beta", "2", "2")(batch, CounterRandom(1))
+      self.assertTrue(c.min() < -1500000000 and c.max() > 1500000000)
+
+      c = sampler("binary(1)", "beta", "1", "1")(batch, CounterRandom(1))
+      self.assertEqual(sorted(set(c)), [0, 1])
+
+      # floating point types keep the values
+      c = sampler("float64", "gamma", "2", "3")(batch, CounterRandom(1))
+      self.assertEqual(c.dtype.name, "float64")
+      self.assertAlmostEqual(c.mean(), 6, places=0)
+
+      c = sampler("float32", "beta", "2", "5")(batch, CounterRandom(1))
+      self.assertEqual(c.dtype.name, "float32")
+      self.assertAlmostEqual(c.mean(), 2.0 / 7, places=2)
+
+      # values saturate at the limits of the type
+      c = sampler("binary(2)", "log-normal", "2", "1")(batch, CounterRandom(1))
+      self.assertEqual(c.dtype.name, "uint8")
+      self.assertEqual(sorted(set(c)), [0, 1, 2, 3])
+
+      c = sampler("value_list(a, b, c)", "log-normal", "0", "1")(
+            batch, CounterRandom(1))
+      self.assertEqual(sorted(set(c)), [0, 1, 2])
+
+      # the same values regardless of batches
+      gamma = sampler("int(1000)", "gamma", "0.5", "10")
+      whole = gamma(batch, CounterRandom(1))
+      part = gamma(Batch(5000, 100, Schema([], [])), CounterRandom(1, 0, 5000))
+      self.assertTrue((whole[5000:5100] == part).all())
+
+      self.assertRaisesWithMessage(
+            "data type binary not supported by the beta distribution",
+            sampler, "binary(70)", "beta", "2", "5")
+      self.assertRaisesWithMessage(
+            "the log-normal distribution expects two numeric parameters",
+            sampler, "int32", "log-normal", "0", "wide")
+
+      d = Distribution("beta")
+      d.addParameter(0, "2")
+      d.addParameter(1, "5")
+      value = ValueGenerator.getFunction(d)(DataType("int(10)"))
+      self.assertTrue(0 <= value <= 10)
+
+   def test_weightedColumnGenerator(self):
+      batch = Batch(0, 100000, Schema([], []))
+      d = Distribution("weighted")
+      d.addParameter(0, "1, 0, 3, 6")
+
+      sample = ValueGenerator.weightedSampler(
+            DataType("value_list(a, b, c, d)"), d)
+      c = sample(batch, CounterRandom(1))
+
+      self.assertEqual(c.dtype.name, "int32")
+      self.assertEqual(list(numpy.round(numpy.bincount(c) / 1e4)),
+                       [1, 0, 3, 6])
+
+      # the same values regardless of batches
+      part = sample(Batch(700, 10, Schema([], [])), CounterRandom(1, 0, 700))
+      self.assertTrue((c[700:710] == part).all())
+
+      # the probabilities of the alias table are exactly the weights
+      weights = numpy.random.RandomState(3).zipf(1.5, 1000).astype(float)
+      accept, alias = ValueGenerator.aliasTable(weights)
+      probabilities = accept.copy()
+      numpy.add.at(probabilities, alias, 1 - accept)
+
+      self.assertTrue(numpy.allclose(
+            probabilities / len(weights), weights / weights.sum()))
+
+      d.parameters[0] = "1, 2"
+      self.assertRaisesWithMessage(
+            "expected 6 weights, got 2",
+            ValueGenerator.weightedSampler, DataType("int(5)"), d)
+
+      d.parameters[0] = "1, -2"
+      self.assertRaisesWithMessage(
+            "weights should be non-negative numbers, not all zero",
+            ValueGenerator.weightedSampler, DataType("int(1)"), d)
+
+      d.parameters[0] = "1, x"
+      self.assertRaisesWithMessage(
+            "invalid weights: 1, x",
+            ValueGenerator.weightedSampler, DataType("int(1)"), d)
+
+   def test_roundRobinColumnGenerator(self):
+      d = Distribution("roundrobin")
+      sample = ValueGenerator.roundRobinSampler(
+            DataType("value_list(a, b, c)"), d)
+
+      c = sample(Batch(0, 7, Schema([], [])), None)
+      self.assertEqual(list(c), [0, 1, 2, 0, 1, 2, 0])
+
+      c = sample(Batch(5, 3, Schema([], [])), None)
+      self.assertEqual(list(c), [2, 0, 1])
+
+      sample = ValueGenerator.roundRobinSampler(DataType("int32"), d)
+      c = sample(Batch(2, 2, Schema([], [])), None)
+      self.assertEqual(list(c), [-2147483646, -2147483645])
+
+      dt = DataType("int(9)")
+      self.assertEqual(ValueGenerator.getFunction(d)(
+            dt, Instance(13, [], [])), 3)
+
+      # the sampler is built once per data type
+      sampler = d.sampler
+      self.assertEqual(ValueGenerator.getFunction(d)(
+            dt, Instance(14, [], [])), 4)
+      self.assertTrue(d.sampler is sampler)
+
    def test_stringGenerator(self):
-      # TODO: test for string, eg. "string(10)" is a 10 character string
-      pass
+      batch = Batch(0, 10000, Schema([], []))
+      dt = DataType("string(10)")
+
+      c = ValueGenerator.generateUniformColumn(dt, batch, CounterRandom(1))
+      self.assertEqual(c.dtype.name, "string80")
+      self.assertEqual(set(map(len, c)), set([10]))
+      self.assertEqual(set("".join(c)), set(DataType.defaultAlphabet))
+
+      dt.setAlphabet("xyz")
+      c = ValueGenerator.generateUniformColumn(dt, batch, CounterRandom(1))
+      counts = numpy.bincount(numpy.frombuffer(c.tostring(), numpy.uint8))
+      self.assertEqual(list(numpy.flatnonzero(counts)), map(ord, "xyz"))
+      self.assertTrue(32000 < counts[counts > 0].min() < 33333 <
+                      counts.max() < 34500)
+
+      # the same strings regardless of batches
+      part = ValueGenerator.generateUniformColumn(
+            dt, Batch(300, 50, Schema([], [])), CounterRandom(1, 0, 300))
+      self.assertTrue((c[300:350] == part).all())
+
+      # lengths following a distribution
+      d = Distribution("beta")
+      d.addParameter(0, "2")
+      d.addParameter(1, "2")
+      c = ValueGenerator.continuousSampler(dt, d)(batch, CounterRandom(1))
+      lengths = numpy.array(map(len, c))
+      self.assertEqual(lengths.min(), 0)
+      self.assertEqual(lengths.max(), 10)
+      self.assertAlmostEqual(lengths.mean(), 5, places=0)
+
+      value = ValueGenerator.generateUniform(DataType("string(4)"))
+      self.assertEqual(len(value), 4)
 
    """
 class GeneratorTest(unittest.TestCase):
@@ -0,0 +1,49 @@
+from datagenerator.pipeline import Prefetcher
+from datagenerator.test.cases import ExtendedTestCase
+
+import time
+
+class PrefetcherTest(ExtendedTestCase):
+
+   def test_order(self):
+      self.assertEqual(list(Prefetcher(xrange(100), 3)), range(100))
+      self.assertEqual(list(Prefetcher([], 1)), [])
+
+      self.assertRaisesWithMessage(
+            "the prefetch depth should be at least 1", Prefetcher, [], 0)
+
+   def test_bounded(self):
+      produced = []
+
+      def items():
+         for n in range(100):
+            produced.append(n)
+            yield n
+
+      consumed = iter(Prefetcher(items(), 2))
+
+      self.assertEqual(next(consumed), 0)
+      time.sleep(0.2)
+
+      # two items ahead of the one consumed, and none waiting to be queued
+      self.assertEqual(len(produced), 3)
+
+      # the producer stops when the consumer does
+      consumed.close()
+      time.sleep(0.2)
+
+      self.assertEqual(len(produced), 3)
+
+   def test_error(self):
+      def items():
+         yield 1
+         raise Exception("failed")
+
+      consumed = []
+
+      def consume():
+         for item in Prefetcher(items()):
+            consumed.append(item)
+
+      self.assertRaisesWithMessage("failed", consume)
+      self.assertEqual(consumed, [1])
@@ -0,0 +1,102 @@
+from datagenerator.rng import CounterRandom
+from datagenerator.rng import RowRandom
+from datagenerator.test.cases import ExtendedTestCase
+
+import numpy
+
+class CounterRandomTest(ExtendedTestCase):
+
+   def test_reproducible(self):
+      a = CounterRandom(42, 3).bits(100)
+      b = CounterRandom(42, 3).bits(100)
+
+      self.assertEqual(a.dtype.name, "uint64")
+      self.assertTrue((a == b).all())
+
+      # other seeds, streams and draws are independent
+      self.assertFalse((a == CounterRandom(43, 3).bits(100)).any())
+      self.assertFalse((a == CounterRandom(42, 4).bits(100)).any())
+
+      r = CounterRandom(42, 3)
+      r.bits(100)
+
+      self.assertFalse((a == r.bits(100)).any())
+
+   def test_jump(self):
+      r = CounterRandom(7, 1)
+      a = r.randint(0, 256, (1000, 3), dtype=numpy.uint8)
+      b = r.jump(600).randint(0, 256, (400, 3), dtype=numpy.uint8)
+
+      self.assertTrue((a[600:] == b).all())
+
+      a = CounterRandom(7, 1, 10 ** 15).random_sample(5)
+      b = CounterRandom(7, 1, 10 ** 15 - 5).random_sample(10)
+
+      self.assertTrue((a == b[5:]).all())
+
+      # draws for given rows only
+      a = CounterRandom(7, 1).bits(10)
+      b = CounterRandom(7, 1).bits(3, numpy.array([1, 4, 9]))
+
+      self.assertTrue((a[[1, 4, 9]] == b).all())
+
+   def test_ranges(self):
+      r = CounterRandom(1)
+
+      c = r.randint(-2147483648, 2147483648, 10000, dtype=numpy.int32)
+      self.assertEqual(c.dtype.name, "int32")
+      self.assertTrue(c.min() < -2000000000 and c.max() > 2000000000)
+
+      c = r.randint(0, 5, 10000, dtype=numpy.int32)
+      self.assertEqual(sorted(set(c)), [0, 1, 2, 3, 4])
+
+      c = r.randint(3, 4, 10, dtype=numpy.int32)
+      self.assertEqual(set(c), set([3]))
+
+      c = r.randint(0, 1 << 64, 10000, dtype=numpy.uint64)
+      self.assertTrue(c.max() > 1 << 63)
+
+      c = r.random_sample(10000)
+      self.assertTrue(c.min() >= 0 and c.max() < 1)
+      self.assertAlmostEqual(c.mean(), 0.5, places=1)
+
+   def test_randomBytes(self):
+      a = CounterRandom(5).randomBytes((1000, 13))
+      b = CounterRandom(5, 0, 400).randomBytes((600, 13))
+
+      self.assertEqual(a.dtype.name, "uint8")
+      self.assertEqual(a.shape, (1000, 13))
+      self.assertTrue(a.flags.c_contiguous)
+      self.assertTrue((a[400:] == b).all())
+      self.assertEqual(len(set(a.ravel())), 256)
+
+   def test_rowRandom(self):
+      r = RowRandom(9, 4)
+      expected = CounterRandom(9, 4, 100)
+      first, second = expected.random_sample(5), expected.random_sample(5)
+
+      for row in range(5):
+         r.reset(100 + row)
+         self.assertEqual([r.random(), r.random()],
+                          [first[row], second[row]])
+
+   def test_distributions(self):
+      r = CounterRandom(3)
+
+      c = r.standard_normal(100000)
+      self.assertAlmostEqual(c.mean(), 0, places=1)
+      self.assertAlmostEqual(c.std(), 1, places=1)
+
+      for shape in [0.5, 1, 4]:
+         c = r.standard_gamma(shape, 100000)
+         self.assertTrue(c.min() >= 0)
+         self.assertAlmostEqual(c.mean() / shape, 1, places=1)
+         self.assertAlmostEqual(c.var() / shape, 1, places=1)
+
+      # rejections don't change the values of other rows, nor the next draws
+      a = CounterRandom(3, 2)
+      b = CounterRandom(3, 2, 600)
+
+      self.assertTrue(
+            (a.standard_gamma(2, 1000)[600:] == b.standard_gamma(2, 400)).all())
+      self.assertTrue((a.bits(1000)[600:] == b.bits(400)).all())
@@ -0,0 +1,96 @@
+from datagenerator.core import Batch
+from datagenerator.core import DataType
+from datagenerator.core import Distribution
+from datagenerator.core import Feature
+from datagenerator.core import Label
+from datagenerator.core import Schema
+from datagenerator.generation import Configuration
+from datagenerator.generation import DataGenerator
+from datagenerator.stats import Stats
+from datagenerator.test.cases import ExtendedTestCase
+
+from os import remove
+
+import json
+
+class StatsTest(ExtendedTestCase):
+
+   def test_counters(self):
+      f1 = Feature("feature_0", DataType("int32"), Distribution("uniform"))
+      l1 = Label("label_0", DataType("binary(1)"), Distribution("conditional"))
+      batch = Batch(0, 10, Schema([f1], [l1]))
+
+      s = Stats()
+      column = s.wrapColumnSampler(f1, lambda batch, random: batch.columns[0])
+      value = s.wrapValueSampler(l1, lambda instance, random: None)
+
+      column(batch, None)
+      column(batch, None)
+      value(None, None)
+
+      report = s.report()
+
+      self.assertEqual([(i["name"], i["stage"], i["calls"], i["values"])
+                        for i in report["items"]],
+                       [("feature_0", "sampling", 2, 20),
+                        ("label_0", "conditionals", 1, 0)])
+      self.assertEqual(report["stages"]["sampling"]["values"], 20)
+      self.assertEqual(report["stages"]["conditionals"]["calls"], 1)
+
+      # counters taken from a worker are merged into another
+      taken = s.take()
+      column(batch, None)
+
+      self.assertEqual(s.report()["items"][0]["calls"], 1)
+
+      s.merge(taken)
+
+      self.assertEqual(s.report()["items"][0]["calls"], 3)
+      self.assertEqual(s.report()["items"][0]["values"], 30)
+
+   def test_generate(self):
+      DataGenerator.generate(
+            'conf/sample.conf', output_file="test.csv", data_points=250,
+            batch_size=100, stats_file="stats.json")
+
+      report = json.load(open("stats.json"))
+
+      self.assertEqual(
+            [(i["name"], i["stage"], i["calls"], i["values"])
+             for i in report["items"]],
+            [("feature_0", "sampling", 3, 250),
+             ("label_0", "conditionals", 250, 0)])
+
+      for stage in Stats.stages:
+         self.assertEqual(report["stages"][stage]["calls"],
+                          250 if stage == "conditionals" else 3)
+
+      self.assertFalse("stalls" in report)
+
+      # stalls of a pipelined generation
+      DataGenerator.generate(
+            'conf/sample.conf', output_file="test.csv", data_points=250,
+            batch_size=100, stats_file="stats.json", pipeline_depth=2)
+
+      report = json.load(open("stats.json"))
+
+      self.assertEqual(sorted(report["stalls"]), ["generator", "writer"])
+      self.assertTrue(all(seconds >= 0
+                          for seconds in report["stalls"].values()))
+
+      # batches formatted by workers, and written in this process
+      DataGenerator.generate(
+            'conf/sample.conf', workers=2, output_file="test.csv",
+            data_points=250, batch_size=100, stats_file="stats.json")
+
+      report = json.load(open("stats.json"))
+
+      for stage in ["formatting", "writing"]:
+         self.assertEqual((report["stages"][stage]["calls"],
+                           report["stages"][stage]["values"]), (3, 250))
+
+      remove("stats.json")
+      remove("test.csv")
+
+      # disabled by default
+      self.assertEqual(Configuration('conf/sample.conf').stats, None)
@@ -0,0 +1,136 @@
+from datagenerator.generation import Configuration
+from datagenerator.generation import DataGenerator
+from datagenerator.sweep import Sweep
+from datagenerator.sweep import grid
+from datagenerator.test.cases import ExtendedTestCase
+
+import json
+import os
+
+def lineCount(point, fileName):
+   return point["data_points"], len(open(fileName).readlines())
+
+class SweepTest(ExtendedTestCase):
+
+   def test_grid(self):
+      self.assertEqual(grid([("a", [1, 2]), ("b", ["x", "y"])]), [
+            {"a": 1, "b": "x"}, {"a": 1, "b": "y"},
+            {"a": 2, "b": "x"}, {"a": 2, "b": "y"}])
+      self.assertEqual(grid({"b": [1], "a": [2, 3]}),
+                       [{"a": 2, "b": 1}, {"a": 3, "b": 1}])
+
+   def test_datasets(self):
+      base = Configuration('conf/sample.conf', output_file="test.csv")
+      points = grid([("data_points", [10, 20]), ("trace", ["off", "info"])])
+
+      s = Sweep(base, points, 3)
+
+      # tracing doesn't change the data
+      self.assertEqual(s.pointDatasets, [0, 0, 1, 1])
+      self.assertEqual([s.fileName(n) for n in range(4)],
+                       ["test.0.csv", "test.0.csv", "test.1.csv",
+                        "test.1.csv"])
+      self.assertEqual(s.configuration(2).dataPoints, 20)
+
+      results = s.map(lineCount, 2)
+
+      self.assertEqual(results, [(10, 11), (10, 11), (20, 21), (20, 21)])
+
+      # the same data as generating each configuration on its own
+      DataGenerator.generate('conf/sample.conf', seed=3, data_points=20,
+                             output_file="test.csv")
+
+      self.assertEqual(open("test.1.csv").read(), open("test.csv").read())
+
+      for fileName in ["test.csv", "test.0.csv", "test.1.csv"]:
+         os.remove(fileName)
+
+      # points with seeds of their own
+      s = Sweep(base, grid([("data_points", [10]), ("seed", [1, 2, 1])]), 3)
+
+      self.assertEqual(s.pointDatasets, [0, 1, 0])
+      self.assertEqual(s.configuration(1).seed, 2)
+
+      s.generate(2)
+
+      self.assertNotEqual(open("test.0.csv").read(),
+                          open("test.1.csv").read())
+
+      DataGenerator.generate('conf/sample.conf', seed=2, data_points=10,
+                             output_file="test.csv")
+
+      self.assertEqual(open("test.1.csv").read(), open("test.csv").read())
+
+      for fileName in ["test.csv", "test.0.csv", "test.1.csv"]:
+         os.remove(fileName)
+
+   def test_labels(self):
+      base = Configuration.fromOptions({
+            "data_points": 300, "batch_size": 64,
+            "features": 2,
+            "feature_1_type": "int32", "feature_1_distribution": "uniform",
+            "feature_2_type": "binary(4)", "feature_2_distribution": "uniform",
+            "labels": 1,
+            "label_1_type": "binary(1)",
+            "label_1_distribution": "conditional",
+            "label_1_parameter1": "rangeConditional",
+            "label_1_parameter2": "'{}'",
+            "output": "csv", "output_file": "test.csv"})
+
+      arguments = '\'{"instanceMembers": [1], "bucketSize": %d, ' \
+                  '"values": [0, 1]}\''
+      points = grid([
+            ("label_1_parameter2",
+             [arguments % 2 ** 30, arguments % 2 ** 28]),
+            ("label_1_distribution", ["conditional"]),
+            ("feature_2_type", ["binary(4)", "binary(8)"])])
+
+      s = Sweep(base, points, 5)
+
+      # the labels of points with the same features are generated together
+      self.assertEqual([[d["output_file"] for d in group]
+                        for group in s.groups()],
+                       [["test.0.csv", "test.2.csv"],
+                        ["test.1.csv", "test.3.csv"]])
+
+      s.generate(2)
+
+      for n, point in enumerate(points):
+         DataGenerator.generate(base.derive(**point).parser, seed=5)
+
+         self.assertEqual(open(s.fileName(n)).read(),
+                          open("test.csv").read())
+
+         os.remove(s.fileName(n))
+
+      os.remove("test.csv")
+
+      # variants are pipelined, counted and traced like a single generation
+      configs = [s.configuration(n).derive(
+                       pipeline_depth=2, stats_file="stats.%d.json" % n,
+                       trace="info", trace_file="trace.%d.txt" % n)
+                 for n in [0, 2]]
+
+      DataGenerator.generateVariants(configs, 5)
+
+      for n in [0, 2]:
+         DataGenerator.generate(base.derive(**points[n]).parser, seed=5)
+
+         self.assertEqual(open(s.fileName(n)).read(),
+                          open("test.csv").read())
+
+         os.remove(s.fileName(n))
+
+         self.assertTrue("stalls" in json.load(open("stats.%d.json" % n)))
+         self.assertTrue(open("trace.%d.txt" % n).readlines()[-1].startswith(
+               "[info] generator stalled "))
+
+         os.remove("stats.%d.json" % n)
+         os.remove("trace.%d.txt" % n)
+
+      os.remove("test.csv")
+
+      self.assertRaisesWithMessage(
+            "configurations differ in more than their labels",
+            DataGenerator.generateVariants,
+            [s.configuration(0), s.configuration(1)], 5)
@@ -0,0 +1,61 @@
+from datagenerator.core import DataType
+from datagenerator.core import Distribution
+from datagenerator.core import Feature
+from datagenerator.generation import Configuration
+from datagenerator.generation import InstanceGenerator
+from datagenerator.tracing import Tracer
+from datagenerator.test.cases import ExtendedTestCase
+
+from os import remove
+
+class TracerTest(ExtendedTestCase):
+
+   def test_off(self):
+      f1 = Feature("feature_0", DataType("int32"), Distribution("uniform"))
+      sampler = lambda batch, random: None
+
+      t = Tracer()
+
+      # nothing is left behind when tracing is disabled
+      self.assertEqual(t.hook("info"), None)
+      self.assertEqual(t.hook("debug"), None)
+      self.assertTrue(t.wrapColumnSampler(f1, sampler) is sampler)
+      self.assertTrue(t.wrapValueSampler(f1, sampler) is sampler)
+
+      t = Tracer("info")
+
+      self.assertNotEqual(t.hook("info"), None)
+      self.assertEqual(t.hook("debug"), None)
+      self.assertTrue(t.wrapColumnSampler(f1, sampler) is sampler)
+
+      self.assertRaisesWithMessage("unknown trace level all", Tracer, "all")
+      self.assertRaisesWithMessage(
+            "sampling rate out of the [0, 1] range: 2", Tracer, "debug", None,
+            0, {"feature_0": 2})
+
+   def test_debug(self):
+      conf = Configuration(
+            'conf/sample.conf', trace="debug", trace_file="trace.txt",
+            feature_1_trace_sample=1)
+
+      ig = InstanceGenerator(conf, 5)
+      traced = ig.generateBatch(3)
+      conf.tracer.close()
+
+      lines = open('trace.txt').readlines()
+      feature = traced.column(conf.features[0])
+
+      self.assertEqual(lines[0], "[info] generating instances 0 to 2\n")
+      self.assertEqual(
+            lines[1], "[debug] feature_0: 3 values for instances 0 to 2\n")
+      self.assertEqual(lines[2:], [
+            "feature_0[" + str(n) + "] = " + str(feature[n]) + "\n"
+            for n in range(3)])
+
+      remove('trace.txt')
+
+      # tracing doesn't alter the generated data
+      ig = InstanceGenerator(Configuration('conf/sample.conf'), 5)
+
+      self.assertTrue(
+            (ig.generateBatch(3).column(conf.features[0]) == feature).all())
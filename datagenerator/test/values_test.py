@@ -0,0 +1,80 @@
+from datagenerator.core import DataType
+from datagenerator.test.cases import ExtendedTestCase
+from datagenerator.values import ValuesFile
+from datagenerator.values import tables
+
+from os import remove
+from os.path import abspath
+
+import numpy
+import pickle
+
+class ValuesFileTest(ExtendedTestCase):
+
+   def test_basic(self):
+      valuesFile = open('values.txt', 'w')
+      valuesFile.write('Alice\nBob\r\n\nCarol Ann\nDan')
+      valuesFile.close()
+
+      values = ValuesFile('values.txt')
+
+      self.assertEqual(len(values), 4)
+      self.assertEqual(list(values), ["Alice", "Bob", "Carol Ann", "Dan"])
+      self.assertEqual(values[2], "Carol Ann")
+      self.assertEqual(values.longest(), 9)
+      self.assertEqual(values.index("Dan"), 3)
+      self.assertRaises(ValueError, values.index, "Eve")
+      self.assertEqual(values.take(numpy.array([3, 0, 0])),
+                       ["Dan", "Alice", "Alice"])
+
+      dataType = DataType("value_list", values)
+
+      self.assertEqual(dataType.size, 9)
+      self.assertEqual(dataType.encode("Bob"), 1)
+      self.assertEqual(dataType.decode(2), "Carol Ann")
+      self.assertTrue(dataType == DataType("value_list", pickle.loads(
+            pickle.dumps(values))))
+
+      # the offset table is the same when built block by block
+      ValuesFile.blockSize = 4
+
+      try:
+         starts, lengths = ValuesFile.lines(values.data)
+      finally:
+         ValuesFile.blockSize = 1 << 26
+
+      self.assertEqual(starts.tolist(), values.starts.tolist())
+      self.assertEqual(lengths.tolist(), values.lengths.tolist())
+
+      # and built once per file, while it doesn't change
+      other = ValuesFile('values.txt')
+      self.assertTrue(other.table is values.table)
+      self.assertEqual(other.index("Bob"), 1)
+
+      other.close()
+      self.assertEqual(other.table, None)
+      self.assertTrue(values.table is not None)
+
+      valuesFile = open('values.txt', 'a')
+      valuesFile.write('\nEve\nBob')
+      valuesFile.close()
+
+      with ValuesFile('values.txt') as other:
+         self.assertFalse(other.table is values.table)
+         self.assertEqual(other.index("Eve"), 4)
+         self.assertEqual(other.index("Bob"), 1)
+
+      # tables are only kept while files using them are open
+      values.close()
+      self.assertFalse(abspath('values.txt') in tables)
+
+      open('values.txt', 'w').close()
+
+      self.assertRaisesWithMessage(
+            "values file values.txt is empty", ValuesFile, 'values.txt')
+
+      remove('values.txt')
+
+      self.assertRaisesWithMessage(
+            "can't read values file values.txt: No such file or directory",
+            ValuesFile, 'values.txt')
@@ -1,12 +1,22 @@
+from datagenerator.core import Batch
 from datagenerator.core import DataType
 from datagenerator.core import Distribution
 from datagenerator.core import Feature
 from datagenerator.core import Instance
 from datagenerator.core import Label
+from datagenerator.core import Schema
+from datagenerator.generation import ValueGenerator
+from datagenerator.values import ValuesFile
+from datagenerator.writers import Writer
 from datagenerator.writers import WriterFactory
 from datagenerator.test.cases import ExtendedTestCase
 
 from os import remove
+from shutil import rmtree
+
+import json
+
+import numpy
 
 class FactoryTest(ExtendedTestCase):
 
@@ -45,8 +55,173 @@ class CSVWriterTest(ExtendedTestCase):
       self.assertEqual(lines[0], "feature1,label1\n")
       self.assertEqual(lines[1], "jorono,1\n")
 
+      # fields with separators or quotes are quoted
+      w = WriterFactory.create(output="csv", output_file="test.csv")
+      i = Instance(2, [f1], [l1])
+      i.assign(f1, 'a,"b"')
+      i.assign(l1, "1")
+
+      w.open()
+      w.write(i)
+      w.close()
+
+      self.assertEqual(open('test.csv').readlines()[1], '"a,""b""",1\n')
+
+      dt = DataType("string(4)")
+      dt.setAlphabet(",")
+      b = Batch(0, 1, Schema([Feature("f", dt, None)], []))
+      b.columns[0][0] = ",,"
+
+      w = WriterFactory.create(output="csv", output_file="test.csv")
+      w.open()
+      w.writeBatch(b)
+      w.close()
+
+      self.assertEqual(open('test.csv').readlines()[1], '",,"\n')
+
       remove("test.csv")
 
+   def test_batch(self):
+      w = WriterFactory.create(output="csv", output_file="test.csv")
+
+      f1 = Feature("feature_1",DataType("int32"), Distribution("uniform"))
+      f2 = Feature("feature_2",DataType("binary(3)"), Distribution("uniform"))
+      l1 = Label("label_1",DataType("binary(1)"), Distribution("uniform"))
+
+      b = Batch(0, 2, Schema([f1, f2], [l1]))
+
+      b.column(f1)[:] = [-7, 12]
+      b.column(f2)[:] = [5, 0]
+      b.column(l1)[:] = [1, 0]
+
+      w.open()
+      w.writeBatch(b)
+      w.close()
+
+      lines = open('test.csv').readlines()
+      self.assertEqual(
+            lines, ["feature1,feature2,label1\n", "-7,101,1\n", "12,0,0\n"])
+
+      remove("test.csv")
+
+   def test_formatBatch(self):
+      items = [
+            Feature("feature_" + str(n), DataType(spec), Distribution("uniform"))
+            for n, spec in enumerate(["int32", "int(5)", "binary(3)",
+                                      "binary(20)", "binary(70)",
+                                      "value_list(a, bb, ccc)", "float32",
+                                      "float64"])]
+      l1 = Label("label_1",DataType("binary(1)"), Distribution("uniform"))
+
+      schema = Schema(items, [l1])
+      random = numpy.random.RandomState(0)
+      b = Batch(0, 50, schema)
+
+      for n, item in enumerate(schema.items):
+         b.columns[n] = ValueGenerator.generateUniformColumn(
+               item.dataType, b, random)
+
+      # same as writing row by row
+      w = WriterFactory.create(output="csv", output_file="test.csv")
+      w.open()
+      Writer.writeBatch(w, b)
+      w.close()
+
+      expected = open('test.csv').read()
+
+      w = WriterFactory.create(output="csv", output_file="test.csv")
+      w.open()
+      w.writeBatch(Batch(0, 0, schema))
+      w.writeBatch(b)
+      w.close()
+
+      self.assertEqual(open('test.csv').read(), expected)
+
+      # no header
+      w = WriterFactory.create(
+            output="csv", output_file="test.csv", output_header="false")
+      w.open()
+      w.writeBatch(b)
+      w.close()
+
+      self.assertEqual(
+            open('test.csv').read(), expected[expected.index('\n') + 1:])
+
+      remove("test.csv")
+
+      self.assertRaisesWithMessage(
+            "invalid value for 'output_header': maybe",
+            WriterFactory.create,
+            output="csv", output_file="test.csv", output_header="maybe")
+
+   def test_floats(self):
+      f1 = Feature("feature_1", DataType("float32"), Distribution("uniform"))
+      l1 = Label("label_1", DataType("float64"), Distribution("uniform"))
+      b = Batch(0, 3, Schema([f1], [l1]))
+
+      b.columns[0][:] = [0.1, 2.5, -1e-7]
+      b.columns[1][:] = [1 / 3.0, 1e20, 0]
+
+      # by default, as many digits as the type needs to read back the value
+      w = WriterFactory.create(output="csv", output_file="test.csv")
+      w.open()
+      w.writeBatch(b)
+      w.write(b.instance(0))
+      w.close()
+
+      self.assertEqual(open('test.csv').read(),
+            "feature1,label1\n"
+            "0.1,0.3333333333333333\n"
+            "2.5,1e+20\n"
+            "-1e-07,0.0\n"
+            "0.1,0.3333333333333333\n")
+
+      w = WriterFactory.create(output="csv", output_file="test.csv",
+                               output_header="no", output_float_precision=3)
+      w.open()
+      w.writeBatch(b)
+      w.write(b.instance(0))
+      w.close()
+
+      self.assertEqual(open('test.csv').read(),
+            "0.1,0.333\n2.5,1e+20\n-1e-07,0\n0.1,0.333\n")
+
+      remove("test.csv")
+
+      self.assertRaisesWithMessage(
+            "'output_float_precision' should be a positive integer",
+            WriterFactory.create,
+            output="csv", output_file="test.csv", output_float_precision=0)
+
+   def test_valuesFile(self):
+      valuesFile = open('values.txt', 'w')
+      valuesFile.write('New York\nBoston\ndan,o\'neil\nsay "hi"\n')
+      valuesFile.close()
+
+      f1 = Feature("feature_1",
+                   DataType("value_list", ValuesFile('values.txt')),
+                   Distribution("uniform"))
+      l1 = Label("label_1", DataType("binary(1)"), Distribution("uniform"))
+      b = Batch(0, 4, Schema([f1], [l1]))
+
+      b.columns[0][:] = [1, 0, 2, 3]
+
+      for output, expected in [
+            ("csv", "Boston,0\nNew York,0\n\"dan,o'neil\",0\n"
+                    "\"say \"\"hi\"\"\",0\n"),
+            ("arff", "Boston,0\n'New York',0\n'dan,o\\'neil',0\n"
+                     "'say \"hi\"',0\n")]:
+         w = WriterFactory.create(output=output, output_file="test.out",
+                                  output_header="false")
+         w.open()
+         w.writeBatch(b)
+         w.close()
+
+         self.assertTrue(open('test.out').read().endswith(expected))
+
+      remove("test.out")
+      remove("values.txt")
+
 class ARFFWriterTest(ExtendedTestCase):
 
    def test_basic(self):
@@ -74,3 +249,187 @@ class ARFFWriterTest(ExtendedTestCase):
       self.assertEqual(lines[5], "34,1\n")
 
       remove("test.arff")
+
+   def test_types(self):
+      items = [
+            Feature("feature_1", DataType("int(3)"), Distribution("uniform")),
+            Feature("feature_2", DataType("value_list(a, b)"),
+                    Distribution("uniform")),
+            Feature("feature_3", DataType("string(8)"),
+                    Distribution("uniform")),
+            Feature("feature_4", DataType("binary(8)"),
+                    Distribution("uniform")),
+            Feature("feature_5", DataType("binary(100)"),
+                    Distribution("uniform")),
+            Feature("feature_6", DataType("float32"), Distribution("uniform")),
+            Label("label_1", DataType("binary(1)"), Distribution("uniform"))]
+
+      schema = Schema(items[:-1], items[-1:])
+      b = Batch(0, 2, schema)
+
+      b.columns[0][:] = [0, 3]
+      b.columns[1][:] = [1, 0]
+      b.columns[2][:] = ["it's", "x"]
+      b.columns[3][:] = [0, 5]
+      b.columns[4][1] = items[4].dataType.encode(6)
+      b.columns[5][:] = [0.5, 0]
+      b.columns[6][:] = [1, 0]
+
+      w = WriterFactory.create(output="arff", output_file="test.arff")
+
+      w.open()
+      w.writeBatch(b)
+      w.close()
+
+      self.assertEqual(open('test.arff').read(),
+            "@relation synthetic\n"
+            "@attribute feature1 {0, 1, 2, 3}\n"
+            "@attribute feature2 {a, b}\n"
+            "@attribute feature3 string\n"
+            "@attribute feature4 numeric\n"
+            "@attribute feature5 string\n"
+            "@attribute feature6 numeric\n"
+            "@attribute label1 {0, 1}\n"
+            "\n"
+            "@data\n"
+            "0,b,'it\\'s',0,0,0.5,1\n"
+            "3,a,x,5,110,0.0,0\n")
+
+      w = WriterFactory.create(
+            output="arff", output_file="test.arff", output_sparse="true")
+
+      w.open()
+      w.writeBatch(b)
+      w.close()
+
+      lines = open('test.arff').readlines()
+
+      self.assertEqual(lines[-2:], [
+            "{1 b,2 'it\\'s',4 0,5 0.5,6 1}\n",
+            "{0 3,2 x,3 5,4 110}\n"])
+
+      remove("test.arff")
+
+class NPYWriterTest(ExtendedTestCase):
+
+   def test_batch(self):
+      self.assertRaisesWithMessage(
+            "missing 'data_points' argument",
+            WriterFactory.create,
+            output="npy", output_file="test.npy.d")
+
+      f1 = Feature("feature_1", DataType("int32"), Distribution("uniform"))
+      f2 = Feature("feature_2", DataType("value_list(a, b, c)"),
+                   Distribution("uniform"))
+      f3 = Feature("feature_3", DataType("binary(100)"),
+                   Distribution("uniform"))
+      l1 = Label("label_1", DataType("binary(1)"), Distribution("uniform"))
+
+      schema = Schema([f1, f2, f3], [l1])
+      batches = [Batch(start, 3, schema) for start in (0, 3)]
+
+      for b in batches:
+         b.columns = [ValueGenerator.uniformSampler(item.dataType)(
+               b, numpy.random.RandomState(b.start)) for item in schema.items]
+
+      w = WriterFactory.create(
+            output="npy", output_file="test.npy.d", data_points="6")
+
+      w.open()
+
+      for b in batches:
+         w.writeBatch(b)
+
+      w.close()
+
+      sidecar = json.load(open('test.npy.d/schema.json'))
+
+      self.assertEqual(sidecar["rows"], 6)
+      self.assertEqual([c["name"] for c in sidecar["columns"]],
+                       ["feature1", "feature2", "feature3", "label1"])
+      self.assertEqual(sidecar["columns"][1]["values"], ["a", "b", "c"])
+      self.assertEqual(sidecar["columns"][2]["shape"], [13])
+
+      for n, c in enumerate(sidecar["columns"]):
+         column = numpy.load('test.npy.d/' + c["file"], mmap_mode='r')
+
+         self.assertEqual(column.dtype.str, c["dtype"])
+         self.assertTrue((column[:3] == batches[0].columns[n]).all())
+         self.assertTrue((column[3:] == batches[1].columns[n]).all())
+
+      # fewer instances than announced
+      w = WriterFactory.create(
+            output="npy", output_file="test.npy.d", data_points="7")
+
+      w.open()
+      w.writeBatch(batches[0])
+
+      self.assertRaisesWithMessage(
+            "only 3 of 7 instances written", w.close)
+
+      rmtree("test.npy.d")
+
+class LIBSVMWriterTest(ExtendedTestCase):
+
+   def test_batch(self):
+      f1 = Feature("feature_1", DataType("int32"), Distribution("uniform"))
+      f2 = Feature("feature_2", DataType("binary(4)"), Distribution("uniform"))
+      f3 = Feature("feature_3", DataType("binary(70)"),
+                   Distribution("uniform"))
+      f4 = Feature("feature_4", DataType("value_list(a, b)"),
+                   Distribution("uniform"))
+      l1 = Label("label_1", DataType("binary(1)"), Distribution("uniform"))
+      l2 = Label("label_2", DataType("int(5)"), Distribution("uniform"))
+
+      schema = Schema([f1, f2, f3, f4], [l1, l2])
+      b = Batch(0, 3, schema)
+
+      b.columns[0][:] = [0, -7, 2]
+      b.columns[1][:] = [0, 5, 8]
+      b.columns[2][0] = f3.dataType.encode((1 << 69) | 2)
+      b.columns[3][:] = [1, 0, 0]
+      b.columns[4][:] = [1, 0, 1]
+      b.columns[5][:] = [3, 0, 5]
+
+      w = WriterFactory.create(output="libsvm", output_file="test.svm")
+
+      w.open()
+      w.writeBatch(b)
+      w.write(b.instance(2))
+      w.close()
+
+      self.assertEqual(open('test.svm').read(),
+            "1,3 6:1 74:1 76:1\n"
+            "0,0 1:-7 3:1 5:1\n"
+            "1,5 1:2 2:1\n"
+            "1,5 1:2 2:1\n")
+
+      remove("test.svm")
+
+      # floating point features and labels
+      f5 = Feature("feature_5", DataType("float64"), Distribution("uniform"))
+      l3 = Label("label_3", DataType("float32"), Distribution("uniform"))
+      b = Batch(0, 2, Schema([f5, f2], [l3]))
+
+      b.columns[0][:] = [0, 0.25]
+      b.columns[1][:] = [1, 0]
+      b.columns[2][:] = [1.5, -2]
+
+      w = WriterFactory.create(output="libsvm", output_file="test.svm")
+
+      w.open()
+      w.writeBatch(b)
+      w.close()
+
+      self.assertEqual(open('test.svm').read(),
+            "1.5 5:1\n"
+            "-2.0 1:0.25\n")
+
+      remove("test.svm")
+
+      b = Batch(0, 1, Schema([Feature(
+            "feature_1", DataType("string(4)"), Distribution("uniform"))],
+            [l1]))
+
+      self.assertRaisesWithMessage(
+            "Unsupported data type string", w.formatBatch, b)
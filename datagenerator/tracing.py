@@ -0,0 +1,151 @@
+import numpy
+import sys
+
+from random import Random
+
+"""
+   Level-gated tracing of the generation. Tracing is resolved when the
+   generation gets compiled (see :class:`datagenerator.generation.
+   GenerationPlan`): a disabled level doesn't leave any hook behind, so
+   tracing costs nothing when it's off.
+
+   Levels are, in increasing order of verbosity::
+
+      off   -- nothing gets traced
+      info  -- one line per generated batch
+      debug -- one line per item of every batch, plus the values of the items
+               picked by the sampling rates (see :class:`Tracer`)
+
+   Traces are written to a separate sink (a file or ``stderr``), never to
+   ``stdout``, so that they can't corrupt generated data sent through a pipe.
+"""
+
+class Tracer():
+   levels = ["off", "info", "debug"]
+
+   def __init__(self, level="off", fileName=None, sample=0.0, itemSamples=None):
+      """Creates a tracer
+
+      Args:
+         level (str): one of :attr:`levels`
+         fileName (str): file where traces are written. If not given, they
+                         go to ``stderr``
+         sample (float): the fraction, in the [0, 1] range, of the generated
+                         values of every item that get traced at ``debug``
+                         level
+         itemSamples (dict): per-item sampling rates (keyed by item name)
+                             that override ``sample``
+
+      Raises:
+         Exception: if the level is unknown or a rate is out of range
+
+      """
+      if level not in Tracer.levels:
+         raise Exception("unknown trace level " + level)
+
+      self.level = Tracer.levels.index(level)
+      self.fileName = fileName
+      self.sample = sample
+      self.itemSamples = itemSamples or {}
+      self.sink = None
+
+      for rate in [sample] + self.itemSamples.values():
+         if rate < 0 or rate > 1:
+            raise Exception("sampling rate out of the [0, 1] range: " +
+                            str(rate))
+
+      # a source of randomness of its own, so that tracing doesn't alter the
+      # generated data
+      self.random = numpy.random.RandomState()
+      self.valueRandom = Random()
+
+   def enabled(self, level):
+      return self.level >= Tracer.levels.index(level)
+
+   def hook(self, level):
+      """
+         Returns a function that traces a message at the given level, or
+         ``None`` if the level is disabled. Hooks are meant to be obtained
+         once, out of the hot path, which then only checks for ``None``
+      """
+      if self.level == 0 or not self.enabled(level):
+         return None
+
+      prefix = "[" + level + "] "
+
+      def trace(message):
+         self.write(prefix + message + "\n")
+
+      return trace
+
+   def samplingRate(self, item):
+      return self.itemSamples.get(item.name, self.sample)
+
+   def wrapColumnSampler(self, item, sampler):
+      """
+         Returns a column sampler (see :class:`datagenerator.generation.
+         GenerationPlan`) that traces what the given one generates, or the
+         given sampler itself if ``debug`` is disabled
+      """
+      if not self.enabled("debug"):
+         return sampler
+
+      trace = self.hook("debug")
+      rate = self.samplingRate(item)
+
+      def tracedSampler(batch, random):
+         column = sampler(batch, random)
+
+         trace(item.name + ": " + str(len(column)) + " values for instances " +
+               str(batch.start) + " to " + str(batch.start + len(batch) - 1))
+
+         if rate > 0:
+            picked = self.random.random_sample(len(column)) < rate
+
+            for row in numpy.flatnonzero(picked):
+               self.traceValue(
+                     item, batch.start + row, item.dataType.decode(column[row]))
+
+         return column
+
+      return tracedSampler
+
+   def wrapValueSampler(self, item, sampler):
+      """
+         Returns a value sampler (see :class:`datagenerator.generation.
+         GenerationPlan`) that traces what the given one generates, or the
+         given sampler itself if ``debug`` is disabled or if none of the
+         values of the item get sampled
+      """
+      rate = self.samplingRate(item)
+
+      if not self.enabled("debug") or rate == 0:
+         return sampler
+
+      def tracedSampler(instance, random):
+         value = sampler(instance, random)
+
+         if self.valueRandom.random() < rate:
+            self.traceValue(item, instance.number, value)
+
+         return value
+
+      return tracedSampler
+
+   def traceValue(self, item, number, value):
+      self.write(item.name + "[" + str(number) + "] = " + str(value) + "\n")
+
+   def write(self, text):
+      if self.sink is None:
+         if self.fileName is None:
+            self.sink = sys.stderr
+         else:
+            self.sink = open(self.fileName, 'w')
+
+      self.sink.write(text)
+
+   def close(self):
+      if self.sink is not None and self.sink is not sys.stderr:
+         self.sink.close()
+
+      self.sink = None
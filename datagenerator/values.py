@@ -0,0 +1,200 @@
+import mmap
+import numpy
+import os
+import weakref
+
+"""
+   Values of ``value_list`` data types read from files, one value per line.
+   Files can be large (eg. millions of names, ZIP codes or addresses), so
+   they're memory-mapped instead of loaded: the file is scanned once, block
+   by block, for the offset table of its lines, and values are only read
+   when they get written, by index. Generating a ``value_list`` column only
+   draws indexes (see :meth:`datagenerator.generation.ValueGenerator.
+   uniformSampler`), which doesn't touch the file at all.
+
+   The offset table of a file is shared by all the open :class:`ValuesFile`
+   of the process that read it (eg. the ones of configurations derived from
+   another), as long as the file doesn't change. It's dropped once they're
+   all closed.
+"""
+
+# the offset tables of the files open, by absolute path
+tables = weakref.WeakValueDictionary()
+
+class ValuesFile():
+   """The lines of a file, as a read-only sequence of strings. Empty lines
+      are skipped and line endings (``\\n`` or ``\\r\\n``) aren't part of the
+      values
+   """
+   # bytes scanned for line endings at a time
+   blockSize = 1 << 26
+
+   def __init__(self, fileName):
+      """
+      Args:
+         fileName (str): the file of values
+
+      Raises:
+         Exception: if the file can't be read or has no values
+
+      """
+      self.fileName = fileName
+      self.open()
+
+   def open(self):
+      try:
+         valuesFile = open(self.fileName, 'rb')
+      except IOError as e:
+         raise Exception("can't read values file " + self.fileName + ": " +
+                         e.strerror)
+
+      try:
+         status = os.fstat(valuesFile.fileno())
+
+         if status.st_size == 0:
+            raise Exception("values file " + self.fileName + " is empty")
+
+         self.data = mmap.mmap(
+               valuesFile.fileno(), 0, access=mmap.ACCESS_READ)
+      finally:
+         valuesFile.close()
+
+      self.table = ValuesFile.table(self.fileName, status, self.data)
+      self.starts, self.lengths = self.table.starts, self.table.lengths
+
+      if len(self.starts) == 0:
+         self.close()
+         raise Exception("values file " + self.fileName + " is empty")
+
+   def close(self):
+      """Unmaps the file and releases its offset table, values can't be read
+         afterwards
+      """
+      self.data.close()
+      self.table = self.starts = self.lengths = None
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, *exception):
+      self.close()
+
+   @staticmethod
+   def table(fileName, status, data):
+      """Returns the offset table (see :class:`LineTable`) of the given file
+         contents, the one already built if the file is the same (same size
+         and modification time) as when it was built
+      """
+      path = os.path.abspath(fileName)
+      version = (status.st_size, status.st_mtime)
+      table = tables.get(path)
+
+      if table is None or table.version != version:
+         table = LineTable(version, *ValuesFile.lines(data))
+         tables[path] = table
+
+      return table
+
+   @staticmethod
+   def lines(data):
+      """Returns the offset table of the non-empty lines of a buffer: the
+         position and the length of every line
+      """
+      content = numpy.frombuffer(data, numpy.uint8)
+      ends = [numpy.flatnonzero(
+                    content[offset:offset + ValuesFile.blockSize] == 10) +
+              offset
+              for offset in range(0, len(content), ValuesFile.blockSize)]
+      ends.append([len(content)])
+      ends = numpy.concatenate(ends).astype(numpy.int64)
+
+      starts = numpy.empty_like(ends)
+      starts[0] = 0
+      starts[1:] = ends[:-1] + 1
+
+      # '\r\n' line endings
+      carriageReturns = ends > starts
+      carriageReturns[carriageReturns] = \
+            content[ends[carriageReturns] - 1] == 13
+      ends -= carriageReturns
+
+      lengths = ends - starts
+      nonEmpty = lengths > 0
+
+      return starts[nonEmpty], lengths[nonEmpty]
+
+   def __len__(self):
+      return len(self.starts)
+
+   def __getitem__(self, n):
+      start = self.starts[n]
+      return self.data[start:start + self.lengths[n]]
+
+   def __iter__(self):
+      data = self.data
+
+      for start, length in zip(self.starts.tolist(), self.lengths.tolist()):
+         yield data[start:start + length]
+
+   def __eq__(self, other):
+      return isinstance(other, ValuesFile) and \
+             os.path.abspath(self.fileName) == os.path.abspath(other.fileName)
+
+   def __ne__(self, other):
+      return not self == other
+
+   def __getstate__(self):
+      # the file gets mapped (and indexed) again when unpickled
+      return {"fileName": self.fileName}
+
+   def __setstate__(self, state):
+      self.fileName = state["fileName"]
+      self.open()
+
+   def longest(self):
+      """Returns the length of the longest value
+      """
+      return int(self.lengths.max())
+
+   def index(self, value):
+      """Returns the index of a value (like ``list.index``). The indexes of
+         all the values are read the first time, and shared like the offset
+         table
+
+      Raises:
+         ValueError: if the value isn't in the file
+      """
+      if self.table.indexes is None:
+         indexes = {}
+
+         for n, line in enumerate(self):
+            indexes.setdefault(line, n)
+
+         self.table.indexes = indexes
+
+      try:
+         return self.table.indexes[value]
+      except KeyError:
+         raise ValueError(repr(value) + " is not in " + self.fileName)
+
+   def take(self, indexes):
+      """Returns the values of a column of indexes, as a list
+      """
+      data = self.data
+      starts = self.starts[indexes]
+      ends = starts + self.lengths[indexes]
+
+      return [data[start:end] for start, end in
+              zip(starts.tolist(), ends.tolist())]
+
+class LineTable():
+   """The offset table of the lines of a values file (see
+      :meth:`ValuesFile.lines`) and, once a value gets looked up, the index of
+      every value
+   """
+   def __init__(self, version, starts, lengths):
+      # the size and modification time of the file
+      self.version = version
+      self.starts = starts
+      self.lengths = lengths
+      self.indexes = None
@@ -1,8 +1,13 @@
-from random import seed
-from random import randint
+import binascii
+import json
+import numpy
+import os
 
-# OS-based seeding (system time)
-seed
+from datagenerator.compression import compressionMethod
+from datagenerator.compression import openOutput
+from datagenerator.core import Batch
+from datagenerator.values import ValuesFile
+from numpy.lib.format import open_memmap
 
 class WriterFactory():
    """
@@ -11,7 +16,7 @@ class WriterFactory():
       For every new writer, we have to add its type in the ``validWriterTypes``
       member variable
    """
-   validWriterTypes = 'csv', 'arff'
+   validWriterTypes = 'csv', 'arff', 'libsvm', 'npy'
 
    @staticmethod
    def create(**kwargs):
@@ -26,27 +31,186 @@ class WriterFactory():
          return CSVWriter(**kwargs)
       elif kwargs["output"] == "arff":
          return ARFFWriter(**kwargs)
+      elif kwargs["output"] == "libsvm":
+         return LIBSVMWriter(**kwargs)
+      elif kwargs["output"] == "npy":
+         return NPYWriter(**kwargs)
       else:
          raise Exception("unknown writer " + kwargs["output"])
 
 class Writer():
    def __init__(self, **kwargs):
-      pass
+      """
+         Reads the compression of the output: ``output_compression`` (one of
+         :data:`datagenerator.compression.methods`, implied by the extension
+         of ``output_file`` if not given), ``output_compression_level`` and
+         ``output_compression_threads``, and the significant digits floating
+         point values are written with, ``output_float_precision`` (by
+         default, as many as needed to read back the same value)
+      """
+      self.compression = kwargs.get("output_compression")
+      self.compressionLevel = Writer.integerOption(
+            kwargs, "output_compression_level")
+      self.compressionThreads = Writer.integerOption(
+            kwargs, "output_compression_threads")
+      self.floatPrecision = Writer.integerOption(
+            kwargs, "output_float_precision")
+
+      if self.compression is not None:
+         compressionMethod(kwargs.get("output_file", ""), self.compression)
+
+      if self.floatPrecision is not None and self.floatPrecision < 1:
+         raise Exception("'output_float_precision' should be a positive "
+                         "integer")
 
    def open(self):
-      self.outFile = open(self.fileName, 'w')
+      self.outFile = openOutput(self.fileName, self.compression,
+                                self.compressionLevel, self.compressionThreads)
 
    def close(self):
       self.outFile.close()
 
+   def writeBatch(self, batch):
+      """
+         Writes a column-oriented :class:`datagenerator.core.Batch`. By
+         default, the batch is written row by row through ``write``
+      """
+      for instance in batch.instances():
+         self.write(instance)
+
+   def columnFormatters(self, schema):
+      """
+         Returns the formatters (see :meth:`columnFormatter`) of the items of
+         the given schema. They're built once and reused for the following
+         batches of the same schema
+      """
+      if getattr(self, 'formattersSchema', None) is not schema:
+         self.formattersSchema = schema
+         self.formatters = [
+               self.columnFormatter(item.dataType, self.floatPrecision)
+               for item in schema.items]
+
+      return self.formatters
+
+   @staticmethod
+   def columnFormatter(dataType, precision=None):
+      """
+         Returns a function that converts a whole column of values of the given
+         type (see :meth:`datagenerator.core.DataType.allocate`) to a list of
+         strings, in the same representation as :meth:`formatValue`
+      """
+      if dataType.name == "int32" or dataType.name == "int":
+         return lambda column: column.astype(str).tolist()
+      elif dataType.isFloat() and precision is None:
+         # the shortest text that reads back as the same value of the type
+         return lambda column: column.astype(str).tolist()
+      elif dataType.isFloat():
+         template = '%.' + str(precision) + 'g'
+         return lambda column: map(template.__mod__, column.tolist())
+      elif dataType.name == "binary" and dataType.shape:
+         return lambda column: [
+               "{0:b}".format(int(binascii.hexlify(value.tostring()), 16))
+               for value in column]
+      elif dataType.name == "binary" and dataType.size <= 16:
+         # narrow binaries are looked up in a table of all their values
+         table = numpy.array(
+               ["{0:b}".format(n) for n in range(1 << dataType.size)])
+         return lambda column: table[column].tolist()
+      elif dataType.name == "binary":
+         return lambda column: map("{0:b}".format, column.tolist())
+      elif dataType.name == "value_list":
+         return Writer.valueFormatter(dataType.values)
+      elif dataType.name == "string":
+         return lambda column: column.tolist()
+      else:
+         return lambda column: map(str, column.tolist())
+
+   @staticmethod
+   def valueFormatter(values, convert=None):
+      """
+         Returns a function that converts a column of indexes of ``value_list``
+         values to a list of the values (converted with the given function).
+         Values read from a file are only read when formatted, the others are
+         converted once
+      """
+      if isinstance(values, ValuesFile):
+         if convert is None:
+            return values.take
+         return lambda column: map(convert, values.take(column))
+
+      if convert is not None:
+         values = map(convert, values)
+
+      values = list(values)
+      return lambda column: map(values.__getitem__, column.tolist())
+
+   @staticmethod
+   def columnNames(schema):
+      """
+         Returns the names the columns of the given schema are written with,
+         ie. ``feature1, ..., featureN, label1, ..., labelM``
+      """
+      features = range(1, len(schema.features) + 1)
+      labels = range(1, len(schema.labels) + 1)
+
+      return ['feature' + str(n) for n in features] + \
+             ['label' + str(n) for n in labels]
+
+   @staticmethod
+   def integerOption(kwargs, name, default=None):
+      if not name in kwargs:
+         return default
+
+      try:
+         return int(kwargs[name])
+      except ValueError:
+         raise Exception("invalid value for '" + name + "': " + kwargs[name])
+
+   @staticmethod
+   def booleanOption(kwargs, name, default):
+      """
+         Reads a boolean writer option (``true``/``false``, ``yes``/``no``,
+         ``on``/``off`` or ``1``/``0``)
+      """
+      if name not in kwargs:
+         return default
+
+      value = str(kwargs[name]).lower()
+
+      if value in ("true", "yes", "on", "1"):
+         return True
+      elif value in ("false", "no", "off", "0"):
+         return False
+      else:
+         raise Exception("invalid value for '" + name + "': " + kwargs[name])
+
+   @staticmethod
+   def formatValue(dataType, value, precision=None):
+      """
+         Returns the textual representation of a value of the given type.
+         ``binary`` values held as integers are written as bit strings and
+         floating point values with the given significant digits (see
+         :meth:`columnFormatter`)
+      """
+      if dataType.name == "binary" and isinstance(value, (int, long)):
+         return "{0:b}".format(value)
+      elif dataType.isFloat() and precision is None:
+         return str(dataType.dtype.type(value))
+      elif dataType.isFloat():
+         return '%.*g' % (precision, value)
+
+      return str(value)
+
 class CSVWriter(Writer):
    def __init__(self, **kwargs):
+      Writer.__init__(self, **kwargs)
+
       if not "output_file" in kwargs:
          raise Exception("missing 'output_file' argument")
 
       self.fileName = kwargs["output_file"]
       self.separator = ","
-      self.includeHeaders = True
+      self.includeHeaders = Writer.booleanOption(kwargs, "output_header", True)
       self.wroteHeaders = False
 
    def write(self, instance):
@@ -72,61 +236,465 @@ class CSVWriter(Writer):
    def writeInstance(self, instance):
       # print the instance
       for counter, f in enumerate(instance.features, start=1):
-         self.outFile.write(str(instance.value(f)) + self.separator)
+         self.outFile.write(
+               CSVWriter.quote(Writer.formatValue(
+                     f.dataType, instance.value(f), self.floatPrecision)) +
+               self.separator)
 
       for counter, l in enumerate(instance.labels, start=1):
-         self.outFile.write(str(instance.value(l)))
+         self.outFile.write(CSVWriter.quote(Writer.formatValue(
+               l.dataType, instance.value(l), self.floatPrecision)))
          if counter < len(instance.labels):
             self.outFile.write(self.separator)
 
       self.outFile.write('\n')
 
+   def writeBatch(self, batch):
+      """
+         Writes a whole batch with a single write (see :meth:`formatBatch`)
+      """
+      self.writeFormatted(batch, self.formatBatch(batch))
+
+   def writeFormatted(self, batch, lines):
+      """
+         Writes the lines of a batch already formatted by
+         :meth:`formatBatch` (eg. by another process). Only the schema and
+         the length of ``batch`` are used
+      """
+      if not self.wroteHeaders and self.includeHeaders:
+         self.writeHeader(batch.schema)
+         self.wroteHeaders = True
+
+      self.outFile.write(lines)
+
+   def formatBatch(self, batch):
+      """
+         Returns the lines of all the instances of a batch, formatted column
+         by column
+      """
+      if len(batch) == 0:
+         return ''
+
+      columns = [formatter(column) for formatter, column in
+                 zip(self.columnFormatters(batch.schema), batch.columns)]
+
+      return '\n'.join(map(self.separator.join, zip(*columns))) + '\n'
+
+   @staticmethod
+   def columnFormatter(dataType, precision=None):
+      """
+         Returns a function that converts a whole column of values of the given
+         type to a list of CSV fields (see :meth:`Writer.columnFormatter`).
+         Strings are only quoted if their alphabet has characters that need
+         it
+      """
+      if dataType.name == "value_list":
+         return Writer.valueFormatter(dataType.values, CSVWriter.quote)
+      elif dataType.name == "string" and \
+           CSVWriter.quote(dataType.alphabet) != dataType.alphabet:
+         return lambda column: map(CSVWriter.quote, column.tolist())
+      else:
+         return Writer.columnFormatter(dataType, precision)
+
+   @staticmethod
+   def quote(value):
+      """
+         Quotes a value if it has separators, quotes or line endings (as in
+         RFC 4180, with quotes doubled)
+      """
+      if not any(c in value for c in ',"\n\r'):
+         return value
+
+      return '"' + value.replace('"', '""') + '"'
+
 class ARFFWriter(Writer):
+   """
+      Writes instances in Weka's ARFF format. Attributes are declared after
+      their data type::
+
+         int32       -- numeric
+         float32/64  -- numeric
+         int(n)      -- nominal {0, 1, ..., n} (numeric above
+                        ``maxNominalValues`` values)
+         value_list  -- nominal, with the values of the list
+         string(n)   -- string
+         binary(1)   -- nominal {0, 1}
+         binary(n)   -- numeric, the value of the n bits (string, as a bit
+                        string, when they don't fit in the 53 bits of
+                        precision of a double)
+
+      With ``output_sparse``, instances are written in the sparse ARFF format
+      (``{index value, ...}``), where zeros (the first value of nominal
+      attributes) are left out. ``string`` attributes are always written.
+   """
+   maxNominalValues = 1 << 16
+   maxNumericBits = 53
+
    def __init__(self, **kwargs):
+      Writer.__init__(self, **kwargs)
+
       if not "output_file" in kwargs:
          raise Exception("missing 'output_file' argument")
 
       self.fileName = kwargs["output_file"]
       self.separator = ","
+      self.sparse = Writer.booleanOption(kwargs, "output_sparse", False)
       self.wroteHeader = False
 
    def write(self, instance):
-      # print the header
+      self.writeBatch(Batch.fromInstance(instance))
+
+   def writeBatch(self, batch):
+      """
+         Writes a whole batch with a single write (see :meth:`formatBatch`)
+      """
+      self.writeFormatted(batch, self.formatBatch(batch))
+
+   def writeFormatted(self, batch, lines):
+      """
+         Writes the lines of a batch already formatted by
+         :meth:`formatBatch`. Only the schema and the length of ``batch``
+         are used
+      """
       if not self.wroteHeader:
-         self.writeHeader(instance)
+         self.writeHeader(batch.schema)
          self.wroteHeader = True
 
-      self.writeInstance(instance)
+      self.outFile.write(lines)
 
-   def writeHeader(self, instance):
+   def writeHeader(self, schema):
+      """
+         Writes the relation and attribute declarations of the given
+         instance or schema
+      """
       self.outFile.write('@relation synthetic\n')
 
-      for counter, f in enumerate(instance.features, start=1):
-         self.outFile.write('@attribute feature' + str(counter))
-         if f.dataType.name == "int32":
-            self.outFile.write(' numeric')
-         else:
-            raise Exception("Unsupported data type " + f.dataType.name)
-         self.outFile.write('\n')
+      for name, item in zip(Writer.columnNames(schema), schema.items):
+         self.outFile.write('@attribute ' + name + ' ' +
+                            ARFFWriter.attributeType(item.dataType) + '\n')
 
-      for counter, l in enumerate(instance.labels, start=1):
-         self.outFile.write('@attribute label' + str(counter))
-         if l.dataType.name == "binary":
-            self.outFile.write(' {0, 1}')
-         else:
-            raise Exception("Unsupported data type " + l.dataType.name)
-         self.outFile.write('\n\n')
+      self.outFile.write('\n@data\n')
 
-      self.outFile.write('@data\n')
+   def formatBatch(self, batch):
+      """
+         Returns the lines of all the instances of a batch, formatted column
+         by column
+      """
+      if len(batch) == 0:
+         return ''
 
-   def writeInstance(self, instance):
-      # print the instance
-      for counter, f in enumerate(instance.features, start=1):
-         self.outFile.write(str(instance.value(f)) + self.separator)
+      columns = [formatter(column) for formatter, column in
+                 zip(self.columnFormatters(batch.schema), batch.columns)]
 
-      for counter, l in enumerate(instance.labels, start=1):
-         self.outFile.write(str(instance.value(l)))
-         if counter < len(instance.labels):
-            self.outFile.write(self.separator)
+      if not self.sparse:
+         return '\n'.join(map(self.separator.join, zip(*columns))) + '\n'
 
-      self.outFile.write('\n')
+      # the (rows x columns) cells that get written
+      written = numpy.column_stack([
+            ARFFWriter.nonZero(item.dataType, column)
+            for item, column in zip(batch.schema.items, batch.columns)])
+      prefixes = [str(n) + ' ' for n in range(len(columns))]
+
+      return ''.join([
+            '{' + self.separator.join([prefixes[n] + cells[n] for n in
+                                       numpy.flatnonzero(row)]) + '}\n'
+            for cells, row in zip(zip(*columns), written)])
+
+   @staticmethod
+   def attributeType(dataType):
+      """
+         Returns the ARFF declaration of an attribute of the given type
+
+      Raises:
+         Exception: if the type can't be written in ARFF
+      """
+      if dataType.name == "int32" or dataType.isFloat():
+         return 'numeric'
+      elif dataType.name == "int":
+         if dataType.values > ARFFWriter.maxNominalValues:
+            return 'numeric'
+         return '{' + ', '.join(map(str, range(dataType.values))) + '}'
+      elif dataType.name == "value_list":
+         return '{' + ', '.join(map(ARFFWriter.quote, dataType.values)) + '}'
+      elif dataType.name == "string":
+         return 'string'
+      elif dataType.name == "binary" and dataType.size == 1:
+         return '{0, 1}'
+      elif dataType.name == "binary":
+         if dataType.size > ARFFWriter.maxNumericBits:
+            return 'string'
+         return 'numeric'
+      else:
+         raise Exception("Unsupported data type " + dataType.name)
+
+   @staticmethod
+   def columnFormatter(dataType, precision=None):
+      """
+         Returns a function that converts a whole column of values of the given
+         type to a list of ARFF values (see :meth:`Writer.columnFormatter`)
+      """
+      if dataType.name == "binary" and \
+         1 < dataType.size <= ARFFWriter.maxNumericBits:
+         return lambda column: column.astype(str).tolist()
+      elif dataType.name == "value_list":
+         return Writer.valueFormatter(dataType.values, ARFFWriter.quote)
+      elif dataType.name == "string":
+         return lambda column: map(ARFFWriter.quote, column.tolist())
+      else:
+         return Writer.columnFormatter(dataType, precision)
+
+   @staticmethod
+   def nonZero(dataType, column):
+      """
+         Returns which values of a column are written in sparse format
+      """
+      if dataType.name == "string" or len(dataType.shape) or \
+         ARFFWriter.attributeType(dataType) == 'string':
+         return numpy.ones(len(column), bool)
+
+      return column != 0
+
+   @staticmethod
+   def quote(value):
+      """
+         Quotes a nominal or string value, if needed, the way Weka does
+      """
+      if value and not any(c in value for c in " \t\n\r,'\"%{}?\\"):
+         return value
+
+      return "'" + value.replace('\\', '\\\\').replace("'", "\\'") \
+                        .replace('\n', '\\n').replace('\r', '\\r') \
+                        .replace('\t', '\\t') + "'"
+
+class LIBSVMWriter(Writer):
+   """
+      Writes instances in the sparse LIBSVM (SVMlight) format, one line per
+      instance::
+
+         label index:value index:value ...
+
+      where only the non-zero features are written, with 1-based indices.
+      Multiple labels are separated by commas. ``binary(n)`` features take one
+      index per bit (the most significant first), ``value_list`` features
+      and labels are written as the index of their value and floating point
+      ones like in the other text formats. ``string`` items aren't
+      supported.
+   """
+   def __init__(self, **kwargs):
+      Writer.__init__(self, **kwargs)
+
+      if not "output_file" in kwargs:
+         raise Exception("missing 'output_file' argument")
+
+      self.fileName = kwargs["output_file"]
+      self.prefixes = []
+
+   def write(self, instance):
+      self.writeBatch(Batch.fromInstance(instance))
+
+   def writeBatch(self, batch):
+      self.writeFormatted(batch, self.formatBatch(batch))
+
+   def writeFormatted(self, batch, lines):
+      self.outFile.write(lines)
+
+   def formatBatch(self, batch):
+      """
+         Returns the lines of all the instances of a batch. The non-zero
+         features of the whole batch are found at once, column by column (in
+         a matrix with a column per index), and then sorted by instance
+      """
+      if len(batch) == 0:
+         return ''
+
+      schema = batch.schema
+
+      if not schema.labels:
+         raise Exception("'libsvm' output needs at least one label")
+
+      rows = [numpy.zeros(0, numpy.int64)]
+      indexes = [numpy.zeros(0, numpy.int64)]
+      values = []
+      width = 0
+
+      for item, column in zip(schema.features, batch.columns):
+         matrix = LIBSVMWriter.featureMatrix(item.dataType, column)
+         featureRows, featureIndexes = numpy.nonzero(matrix)
+
+         rows.append(featureRows)
+         indexes.append(featureIndexes + width)
+         values.extend(LIBSVMWriter.labelFormatter(
+               item.dataType, self.floatPrecision, True)(
+                     matrix[featureRows, featureIndexes]))
+         width += matrix.shape[1]
+
+      if len(self.prefixes) < width:
+         self.prefixes = [str(n) + ':' for n in range(1, width + 1)]
+
+      rows = numpy.concatenate(rows)
+      indexes = numpy.concatenate(indexes)
+      order = numpy.lexsort((indexes, rows))
+      prefixes = self.prefixes
+      cells = [prefixes[index] + values[n] for n, index in zip(
+            order.tolist(), indexes[order].tolist())]
+      ends = numpy.cumsum(numpy.bincount(rows, minlength=len(batch))).tolist()
+
+      labels = [LIBSVMWriter.labelFormatter(
+                     item.dataType, self.floatPrecision)(column) for
+                item, column in zip(schema.labels,
+                                    batch.columns[len(schema.features):])]
+      labels = map(','.join, zip(*labels))
+
+      lines = []
+      start = 0
+
+      for label, end in zip(labels, ends):
+         lines.append(' '.join([label] + cells[start:end]))
+         start = end
+
+      return '\n'.join(lines) + '\n'
+
+   @staticmethod
+   def featureMatrix(dataType, column):
+      """
+         Returns the values of a column of features as a (rows x indexes)
+         matrix, of integers unless the type is a floating point one
+
+      Raises:
+         Exception: if the type can't be written in LIBSVM format
+      """
+      if dataType.name == "binary" and dataType.size > 1:
+         if not dataType.shape:
+            column = column.astype('>u8').view(numpy.uint8).reshape(
+                  len(column), 8)
+
+         bits = numpy.unpackbits(column, axis=1)
+         return bits[:, bits.shape[1] - dataType.size:].astype(numpy.int64)
+      elif dataType.name in ("int32", "int", "binary", "value_list"):
+         return column.astype(numpy.int64)[:, None]
+      elif dataType.isFloat():
+         return column[:, None]
+      else:
+         raise Exception("Unsupported data type " + dataType.name)
+
+   @staticmethod
+   def labelFormatter(dataType, precision=None, expanded=False):
+      """
+         Returns a function that converts a column of labels (or, if
+         ``expanded``, the values of a :meth:`featureMatrix`) to a list of
+         numbers (as strings)
+
+      Raises:
+         Exception: if the type can't be written in LIBSVM format
+      """
+      if dataType.isFloat():
+         return Writer.columnFormatter(dataType, precision)
+      elif expanded or dataType.name in (
+            "int32", "int", "binary", "value_list") and not dataType.shape:
+         return lambda column: column.astype(str).tolist()
+      else:
+         raise Exception("Unsupported data type " + dataType.name)
+
+class NPYWriter(Writer):
+   """
+      Writes every column to its own NumPy ``.npy`` file, inside the directory
+      given as ``output_file``. Files are preallocated for ``data_points``
+      instances and memory-mapped, so batches are copied in without any
+      formatting, and readers can memory-map them too. A ``schema.json``
+      sidecar describes the columns::
+
+         {"rows": 100,
+          "columns": [{"name": "feature1", "type": "value_list",
+                       "dtype": "<i4", "shape": [], "file": "feature1.npy",
+                       "values": ["a", "b"]}, ...]}
+
+      ``binary`` columns hold unsigned integers (or, above 64 bits, rows of
+      big-endian bytes), ``value_list`` columns the index of the value (in
+      ``values``, or in the lines of ``valuesFile`` for values read from a
+      file) and floating point columns the values themselves, without any
+      rounding.
+   """
+   def __init__(self, **kwargs):
+      if not "output_file" in kwargs:
+         raise Exception("missing 'output_file' argument")
+      if not "data_points" in kwargs:
+         raise Exception("missing 'data_points' argument")
+
+      if kwargs.get("output_compression", "none") != "none":
+         raise Exception("'npy' output can't be compressed")
+
+      self.fileName = kwargs["output_file"]
+      self.rows = int(kwargs["data_points"])
+      self.columns = None
+      self.written = 0
+
+   def open(self):
+      if not os.path.isdir(self.fileName):
+         os.makedirs(self.fileName)
+
+   def allocate(self, schema):
+      self.columns = []
+      self.schema = schema
+
+      for name, item in zip(Writer.columnNames(schema), schema.items):
+         if item.dataType.dtype.hasobject:
+            raise Exception("Unsupported data type " + item.dataType.name)
+
+         self.columns.append(open_memmap(
+               os.path.join(self.fileName, name + '.npy'), mode='w+',
+               dtype=item.dataType.dtype,
+               shape=(self.rows,) + item.dataType.shape))
+
+   def write(self, instance):
+      raise Exception("'npy' output can only be written in batches")
+
+   def writeBatch(self, batch):
+      if self.columns is None:
+         self.allocate(batch.schema)
+
+      end = self.written + len(batch)
+
+      if end > self.rows:
+         raise Exception("more than " + str(self.rows) + " instances written")
+
+      for target, column in zip(self.columns, batch.columns):
+         target[self.written:end] = column
+
+      self.written = end
+
+   def close(self):
+      if self.columns is None:
+         return
+
+      for column in self.columns:
+         column.flush()
+
+      if self.written != self.rows:
+         raise Exception("only " + str(self.written) + " of " +
+                         str(self.rows) + " instances written")
+
+      sidecar = {"rows": self.rows, "columns": []}
+
+      for name, item in zip(Writer.columnNames(self.schema), self.schema.items):
+         dataType = item.dataType
+         description = {
+               "name": name,
+               "type": dataType.name,
+               "size": dataType.size,
+               "dtype": dataType.dtype.str,
+               "shape": list(dataType.shape),
+               "file": name + '.npy'}
+
+         if isinstance(dataType.values, ValuesFile):
+            description["valuesFile"] = os.path.abspath(
+                  dataType.values.fileName)
+         elif dataType.name == "value_list":
+            description["values"] = list(dataType.values)
+
+         sidecar["columns"].append(description)
+
+      schemaFile = open(os.path.join(self.fileName, 'schema.json'), 'w')
+      json.dump(sidecar, schemaFile, indent=1)
+      schemaFile.close()
+
+      self.columns = None